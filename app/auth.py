@@ -1,17 +1,24 @@
 # app/auth.py
+import hashlib
 import os
+import secrets
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from dotenv import load_dotenv
 
 from jose import jwt, JWTError
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
 from app.models.user import User
+from app.utils import metrics
+from app.utils.cache import TTLCache
+from app.utils.hashing import HashPool, HashPoolFull, pwd_context, hash_sync, verify_sync
 
 load_dotenv()
 
@@ -19,15 +26,34 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "32"))
+HASH_RETRY_AFTER_SECONDS = int(os.getenv("HASH_RETRY_AFTER_SECONDS", "2"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # sin definir, los endpoints /admin quedan cerrados
 
 # --- HASHING ---
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Argon2 es costoso a propósito: corre en un pool de procesos acotado, fuera del event loop
+hash_pool = HashPool(workers=HASH_WORKERS, queue_size=HASH_QUEUE_SIZE)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def _run_hashing(fn, *args):
+    try:
+        with metrics.PASSWORD_HASHING.labels(fn.__name__.removesuffix("_sync")).time():
+            return await hash_pool.run(fn, *args)
+    except HashPoolFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, reintentá en unos segundos",
+            headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)},
+        )
+
+async def hash_password(password: str) -> str:
+    return await _run_hashing(hash_sync, password)
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await _run_hashing(verify_sync, plain, hashed)
 
 # --- JWT ---
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
@@ -42,28 +68,48 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Tokens ya verificados: sha256(token) -> claims. Cada entrada vence exactamente en el "exp"
+# del token (reloj de pared, igual que jose), así que nunca se acepta un token vencido.
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60, clock=time.time)
+
 def decode_token(token: str) -> Optional[dict]:
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
 
+    exp = payload.get("exp")
+    token_cache.set(key, payload, expires_at=float(exp) if exp is not None else None)
+    return payload
+
 # --- DEPENDENCIAS PARA RUTAS PROTEGIDAS ---
 bearer_scheme = HTTPBearer()  # maneja "Authorization: Bearer <token>"
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado: sólo los campos públicos, sin el hash de la contraseña."""
+    id: int
+    name: str
+    email: str
+
+# Caché por proceso de user_id -> Principal. update_user / delete_user la invalidan;
+# en otros workers una entrada vieja dura como máximo PRINCIPAL_CACHE_TTL_SECONDS.
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+def invalidate_principal(user_id: int):
+    principal_cache.pop(user_id)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-                     db: Session = Depends(get_db)) -> User:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+                           db: AsyncSession = Depends(get_db)) -> Principal:
     """
     Dependencia para obtener el usuario actual a partir del Authorization: Bearer <token>.
     Lanza 401 si el token no es válido o el usuario no existe.
+    El usuario sale de principal_cache cuando está; si no, de una única query a la base.
     """
     token = credentials.credentials
     payload = decode_token(token)
@@ -82,9 +128,22 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    principal = principal_cache.get(int(user_id))
+    if principal is not None:
+        return principal
+
+    user = await db.scalar(select(User).filter(User.id == int(user_id)))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Usuario no encontrado",
                             headers={"WWW-Authenticate": "Bearer"})
-    return user
+
+    principal = Principal(id=user.id, name=user.name, email=user.email)
+    principal_cache.set(principal.id, principal)
+    return principal
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Endpoints operativos (/admin): se habilitan con ADMIN_TOKEN y se autentican con X-Admin-Token."""
+    if not ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
@@ -0,0 +1,73 @@
+"""
+Paso único por deploy: migraciones de Alembic y seed del catálogo de trucos.
+
+    python -m app.bootstrap
+
+Los workers de uvicorn no tocan la base al arrancar, así que esto se corre una vez
+antes de levantarlos (en el pipeline de deploy o a mano en desarrollo).
+"""
+import argparse
+import asyncio
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+from app.database import SessionLocal, engine
+from app.models import equipment, pegue, stats, trick, user  # noqa: F401 (registra todos los mappers)
+from app.utils.seed import seed_tricks
+from app.utils.stats import rebuild_stats
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def run_migrations(revision: str = "head"):
+    command.upgrade(Config(str(ALEMBIC_INI)), revision)
+
+
+async def _seed():
+    try:
+        await seed_tricks()
+    finally:
+        # El pool guarda conexiones de aiosqlite, cuyo hilo no es daemon: sin esto el proceso no termina
+        await engine.dispose()
+
+
+def init(args):
+    run_migrations()
+    if not args.skip_seed:
+        asyncio.run(_seed())
+
+
+async def _rebuild_stats():
+    try:
+        async with SessionLocal() as db:
+            await rebuild_stats(db)
+    finally:
+        await engine.dispose()
+
+
+def rebuild(args):
+    asyncio.run(_rebuild_stats())
+    print("Estadísticas por usuario recalculadas.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.bootstrap", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command")
+
+    init_parser = subparsers.add_parser("init", help="Aplica las migraciones y el seed (comando por defecto)")
+    init_parser.add_argument("--skip-seed", action="store_true", help="Sólo migraciones, sin seed")
+    init_parser.set_defaults(func=init)
+
+    rebuild_parser = subparsers.add_parser("rebuild-stats", help="Recalcula desde cero los resúmenes de estadísticas por usuario")
+    rebuild_parser.set_defaults(func=rebuild)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(["init", *(argv or [])])
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
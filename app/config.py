@@ -0,0 +1,44 @@
+"""
+Configuración de la conexión a la base, leída de variables de entorno (DATABASE_URL, DB_POOL_SIZE,
+SQLITE_BUSY_TIMEOUT_MS, ...). El resto de los módulos sigue leyendo sus opciones con os.getenv.
+"""
+from typing import Literal
+
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    # Driver async: sqlite+aiosqlite, postgresql+asyncpg, mysql+aiomysql
+    database_url: str = "sqlite+aiosqlite:///./keep_bouncing_back.db"
+
+    # Pool por worker: cada proceso de uvicorn abre hasta db_pool_size + db_max_overflow conexiones
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_pre_ping: bool = False  # un SELECT 1 por checkout: útil si un proxy o firewall corta conexiones ociosas
+    db_pool_recycle: int = -1  # segundos; -1 no recicla
+
+    # Pragmas que se aplican a cada conexión SQLite nueva. Con WAL los lectores no bloquean al
+    # escritor y busy_timeout hace que un escritor espere el lock en vez de fallar con "database is locked"
+    sqlite_journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY"] = "WAL"
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+
+    # Slow query log: sentencias más lentas que esto (ms) se guardan con su plan; 0 lo desactiva
+    slow_query_threshold_ms: float = 200
+
+    # Réplicas de lectura (URLs separadas por coma); vacío = todo va al primario
+    database_replica_urls: str = ""
+    replica_health_check_seconds: float = 10
+    replica_health_check_timeout: float = 2
+    # Después de escribir, las lecturas de ese cliente van al primario durante esta ventana
+    read_your_writes_seconds: int = 5
+
+    @property
+    def replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
+
+settings = Settings()
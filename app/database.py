@@ -1,10 +1,106 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
 
-# SQLite database for development
-DATABASE_URL = "sqlite:///./keep_bouncing_back.db"
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from app.config import Settings, settings
+from app.utils import metrics
+from app.utils.slow_queries import slow_query_log
+
+# SQLite por defecto (driver async: aiosqlite); se cambia con la variable de entorno DATABASE_URL
+DATABASE_URL = settings.database_url
+
+# Las sentencias que tarden más que esto quedan en el slow query log con su plan (0 lo desactiva)
+SLOW_QUERY_THRESHOLD_MS = settings.slow_query_threshold_ms
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _set_sqlite_pragmas(config: Settings):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode = {config.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous = {config.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout = {int(config.sqlite_busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA mmap_size = {int(config.sqlite_mmap_size)}")
+            cursor.execute(f"PRAGMA cache_size = {-int(config.sqlite_cache_size_kib)}")  # negativo = KiB
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def build_engine(config: Settings, url: str | None = None):
+    """
+    Engine async según la configuración, para config.database_url o para otra URL (una réplica)
+    con las mismas opciones de pool. Con SQLite en archivo se usa un pool de verdad
+    (aiosqlite trae NullPool por defecto): las conexiones se reutilizan y los pragmas
+    se pagan una vez por conexión, no por request.
+    """
+    url = make_url(url or config.database_url)
+    options = {}
+    if not _is_sqlite_memory(url):
+        options.update(
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_pre_ping=config.db_pool_pre_ping,
+            pool_recycle=config.db_pool_recycle,
+        )
+        if url.get_backend_name() == "sqlite":
+            options["poolclass"] = AsyncAdaptedQueuePool
+
+    async_engine = create_async_engine(url, **options)
+    if url.get_backend_name() == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas(config))
+    return async_engine
+
+
+engine = build_engine(settings)
+# expire_on_commit=False: con AsyncSession no se puede hacer lazy-load implícito después del commit
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
+
+
+async def get_db():
+    """
+    Sesión de la request. FastAPI resuelve cada dependencia una vez por request, así que
+    get_current_user y el handler comparten esta sesión y su transacción. AsyncSession no toma
+    una conexión del pool hasta la primera query: un endpoint que responde desde caché nunca la usa.
+
+    Los handlers que escriben hacen commit antes de responder: con FastAPI 0.104 lo que sigue al
+    yield corre después de enviar la respuesta, y un error de commit ahí ya no le llegaría al cliente.
+    Si el handler falla se hace rollback; al cerrar, la conexión (si se tomó) vuelve al pool.
+    """
+    async with SessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+
+# --- Instrumentación: cantidad de queries y tiempo de base de la request en curso ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    metrics.record_query(elapsed)
+    if SLOW_QUERY_THRESHOLD_MS and elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        slow_query_log.record(conn, statement, parameters, executemany, elapsed)
+
+def instrument_engine(async_engine):
+    """Suma las queries del engine (primario o réplica) a las métricas y al slow query log. Idempotente."""
+    if event.contains(async_engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+instrument_engine(engine)
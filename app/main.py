@@ -1,11 +1,53 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import users, pegues, tricks, equipment
-from app.database import engine
-from app.models import user, pegue, trick, equipment as equipment_model
-from app.utils.seed import seed_tricks
+from app.routers import users, pegues, tricks, equipment, leaderboards, metrics, admin
+from app.database import engine, SessionLocal
+from app.utils import leaderboards as leaderboard_store, recommendations
+from app.utils.replicas import ReadYourWritesMiddleware, read_replicas
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app import auth
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Migraciones y seed se corren una vez por deploy con `python -m app.bootstrap`;
+    # BOOTSTRAP_ON_STARTUP=1 las vuelve a correr al arrancar (cómodo en desarrollo con un solo worker)
+    if os.getenv("BOOTSTRAP_ON_STARTUP") == "1":
+        from app.bootstrap import run_migrations
+        from app.utils.seed import seed_tricks
+        await asyncio.to_thread(run_migrations)
+        await seed_tricks()
+
+    # Rankings y co-ocurrencia de trucos en memoria: se cargan de los resúmenes antes de atender
+    # y se recargan en segundo plano
+    await leaderboard_store.reload(SessionLocal)
+    await recommendations.reload(SessionLocal)
+    refreshers = [
+        asyncio.create_task(leaderboard_store.refresh_forever(SessionLocal)),
+        asyncio.create_task(recommendations.refresh_forever(SessionLocal)),
+    ]
+    if read_replicas.engines:
+        await read_replicas.check()
+        refreshers.append(asyncio.create_task(read_replicas.check_forever()))
+
+    yield
 
-app = FastAPI()
+    for refresher in refreshers:
+        refresher.cancel()
+    auth.hash_pool.shutdown()
+    await read_replicas.dispose()
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+# El último agregado queda afuera: las métricas envuelven al profiler (y le dejan la request en contexto)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,14 +57,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Crear tablas
-user.Base.metadata.create_all(bind=engine)
-
-# Seed inicial
-seed_tricks()
-
 # Incluir routers
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(pegues.router, prefix="/pegues", tags=["Pegues"])
 app.include_router(tricks.router, prefix="/tricks", tags=["Tricks"])
 app.include_router(equipment.router, prefix="/equipment", tags=["Equipment"])
+app.include_router(leaderboards.router, prefix="/leaderboards", tags=["Leaderboards"])
+app.include_router(metrics.router, prefix="/metrics", include_in_schema=False)
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
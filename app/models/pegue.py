@@ -1,16 +1,28 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Table, Index, bindparam, event, \
+    insert_sentinel, inspect, update
 from app.database import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, relationship
 
 pegue_trick_association = Table(
     "pegue_trick",
     Base.metadata,
     Column("pegue_id", Integer, ForeignKey("pegue.id"), primary_key=True),
-    Column("trick_id", Integer, ForeignKey("tricks.id"), primary_key=True)
+    Column("trick_id", Integer, ForeignKey("tricks.id"), primary_key=True),
+    # Copia de pegue.date: el filtro por truco pagina recorriendo (trick_id, date, pegue_id) en orden,
+    # sin ordenar todos los pegues del truco. Nullable porque el ORM inserta primero (pegue_id, trick_id)
+    Column("date", DateTime),
+    # El PK (pegue_id, trick_id) cubre la carga de trucos por pegue; este índice cubre el filtro por truco
+    Index("ix_pegue_trick_trick_id_date_pegue_id", "trick_id", "date", "pegue_id"),
 )
 
 class Pegue(Base):
     __tablename__ = "pegue"
+    # Índices compuestos para la paginación por cursor (date, id), uno por cada filtro de list_pegues
+    __table_args__ = (
+        Index("ix_pegue_date_id", "date", "id"),
+        Index("ix_pegue_user_id_date_id", "user_id", "date", "id"),
+        Index("ix_pegue_equipment_date_id", "equipment", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -18,6 +30,35 @@ class Pegue(Base):
     date = Column(DateTime, nullable=False)
     duration = Column(Integer)
     notes = Column(Text)
+    # Sin centinela, SQLite no garantiza el orden de RETURNING y SQLAlchemy manda un INSERT por fila
+    # cuando se pide sort_by_parameter_order (carga masiva); con él, el lote va en un solo INSERT
+    _sentinel = insert_sentinel("_sentinel")
 
     user = relationship("User", back_populates="pegues")
     tricks = relationship("Trick", secondary=pegue_trick_association, back_populates="pegues")
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_pegue_trick_dates(session, flush_context):
+    """
+    Las filas de pegue_trick que escribe el ORM por la relación tricks no traen la fecha: se
+    completa acá, en la misma transacción. La carga masiva (Core) ya la inserta con la fecha.
+    """
+    rows = []
+    for obj in session.new | session.dirty:
+        if not isinstance(obj, Pegue):
+            continue
+        state = inspect(obj)
+        if obj in session.new:
+            changed = bool(obj.__dict__.get("tricks"))
+        else:
+            changed = state.attrs.date.history.has_changes() or state.attrs.tricks.history.has_changes()
+        if changed:
+            rows.append({"sync_pegue_id": obj.id, "sync_date": obj.date})
+    if rows:
+        session.connection().execute(
+            update(pegue_trick_association)
+            .where(pegue_trick_association.c.pegue_id == bindparam("sync_pegue_id"))
+            .values(date=bindparam("sync_date")),
+            rows,
+        )
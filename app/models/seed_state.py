@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+from datetime import datetime, timezone
+
+class SeedState(Base):
+    __tablename__ = "seed_state"
+
+    name = Column(String(100), primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    applied_at = Column(DateTime, default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
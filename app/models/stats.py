@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Date, Integer, String, ForeignKey
+from app.database import Base
+
+# Resúmenes por usuario que mantienen create_pegue y /pegues/bulk en la misma transacción
+# (ver app/utils/stats.py). Se pueden recalcular con `python -m app.bootstrap rebuild-stats`.
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    total_duration = Column(Integer, nullable=False, default=0)
+    max_level = Column(Integer, nullable=False, default=0)  # 0 = todavía sin trucos
+
+class UserEquipmentStats(Base):
+    __tablename__ = "user_equipment_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    equipment = Column(String(50), primary_key=True)
+    sessions = Column(Integer, nullable=False, default=0)
+
+class UserTrickStats(Base):
+    __tablename__ = "user_trick_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    trick_id = Column(Integer, ForeignKey("tricks.id"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class UserDailyActivity(Base):
+    __tablename__ = "user_daily_activity"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    minutes = Column(Integer, nullable=False, default=0)
+    sessions = Column(Integer, nullable=False, default=0)
+
+class TrickCooccurrence(Base):
+    __tablename__ = "trick_cooccurrence"
+
+    trick_a = Column(Integer, ForeignKey("tricks.id"), primary_key=True)
+    trick_b = Column(Integer, ForeignKey("tricks.id"), primary_key=True)
+    pegues = Column(Integer, nullable=False, default=0)  # pegues con ambos trucos (con a == b, los que tienen a)
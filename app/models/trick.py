@@ -6,7 +6,7 @@ class Trick(Base):
     __tablename__ = "tricks"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False)
+    name = Column(String(100), nullable=False, unique=True, index=True)
     level = Column(Integer, nullable=False)
 
     pegues = relationship("Pegue", secondary="pegue_trick", back_populates="tricks")
@@ -0,0 +1,33 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from app import auth
+from app.schemas import admin as admin_schemas
+from app.utils import profiling
+from app.utils.slow_queries import slow_query_log
+
+router = APIRouter(dependencies=[Depends(auth.require_admin)])
+
+@router.get("/slow-queries", response_model=list[admin_schemas.SlowQueryOut])
+async def list_slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    # Las más recientes primero; el umbral es SLOW_QUERY_THRESHOLD_MS (app/config.py)
+    return slow_query_log.entries()[:limit]
+
+@router.delete("/slow-queries")
+async def clear_slow_queries():
+    slow_query_log.clear()
+    return {"detail": "Slow query log vaciado"}
+
+@router.get("/profiles", response_model=list[admin_schemas.ProfileReportOut])
+async def list_profiles():
+    # Reportes de ProfilingMiddleware (X-Profile: <ADMIN_TOKEN> o PROFILE_SAMPLE_RATE)
+    return profiling.list_reports(profiling.PROFILE_DIR)
+
+@router.get("/profiles/{report_id}")
+async def download_profile(report_id: str, format: Literal["text", "prof"] = "text"):
+    suffix = ".txt" if format == "text" else ".prof"
+    path = profiling.report_path(profiling.PROFILE_DIR, report_id, suffix)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    media_type = "text/plain" if format == "text" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=path.name)
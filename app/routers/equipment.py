@@ -1,29 +1,27 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
 from app.models import equipment
 from app.schemas import equipment as equipment_schemas
+from app.utils.replicas import get_read_db
 
 router = APIRouter()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.get("/", response_model=list[equipment_schemas.EquipmentOut])
-def list_equipment(db: Session = Depends(get_db)):
-    return db.query(equipment.Equipment).all()
+@router.get("/", response_model=list[equipment_schemas.EquipmentOut], response_class=ORJSONResponse)
+async def list_equipment(db: AsyncSession = Depends(get_read_db)):
+    # Columnas de EquipmentOut serializadas directo con orjson, sin objetos del ORM ni segunda validación
+    eq = equipment.Equipment
+    result = await db.execute(select(eq.id, eq.name, eq.created_at).order_by(eq.id))
+    return ORJSONResponse([row._asdict() for row in result])
 
 @router.post("/", response_model=equipment_schemas.EquipmentOut)
-def create_equipment(equipment_data: equipment_schemas.EquipmentCreate, db: Session = Depends(get_db)):
+async def create_equipment(equipment_data: equipment_schemas.EquipmentCreate, db: AsyncSession = Depends(get_db)):
     new_equipment = equipment.Equipment(
         name=equipment_data.name
     )
     db.add(new_equipment)
-    db.commit()
-    db.refresh(new_equipment)
+    await db.commit()
+    await db.refresh(new_equipment)
     return new_equipment
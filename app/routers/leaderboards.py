@@ -0,0 +1,13 @@
+from typing import Literal
+from fastapi import APIRouter, Query
+from app.schemas import leaderboard as leaderboard_schemas
+from app.utils.leaderboards import leaderboards, LEADERBOARD_SIZE
+
+router = APIRouter()
+
+@router.get("/{metric}", response_model=leaderboard_schemas.LeaderboardOut)
+async def get_leaderboard(metric: Literal["level", "duration", "recent"],
+                          limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE)):
+    # level: truco más difícil logrado; duration: tiempo total en la cinta;
+    # recent: sesiones en los últimos LEADERBOARD_RECENT_DAYS días. Se sirve desde memoria, sin tocar la base.
+    return {"metric": metric, "entries": leaderboards.top(metric, limit)}
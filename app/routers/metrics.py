@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Response
+from app.utils.metrics import render_latest
+
+router = APIRouter()
+
+@router.get("")
+async def get_metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
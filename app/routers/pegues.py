@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import pegue, trick
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, noload
+from app.database import get_db
+from app.models import pegue, trick, user
 from app.schemas import pegue as pegue_schemas
+from app.utils.json_stream import iter_json_items, StreamFormatError, NDJSON_CONTENT_TYPES, JSON_CONTENT_TYPES
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.replicas import get_read_db
+from app.utils import stats
+from app.utils.trick_catalog import trick_catalog
 
-router = APIRouter()
+MAX_PAGE_SIZE = 500
+INCLUDABLE = {"tricks"}
+BULK_CHUNK_SIZE = 500
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter()
 
 @router.post("/", response_model=bool)
-def create_pegue(pegue_data: pegue_schemas.PegueCreate, db: Session = Depends(get_db)):
-    trick_objects = db.query(trick.Trick).filter(trick.Trick.id.in_(pegue_data.tricks_ids)).all()
+async def create_pegue(pegue_data: pegue_schemas.PegueCreate, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(trick.Trick).filter(trick.Trick.id.in_(pegue_data.tricks_ids)))
+    trick_objects = result.scalars().all()
 
     if len(trick_objects) != len(pegue_data.tricks_ids):
         raise HTTPException(status_code=400, detail="Uno o más trucos no existen")
@@ -32,10 +39,177 @@ def create_pegue(pegue_data: pegue_schemas.PegueCreate, db: Session = Depends(ge
     new_pegue.tricks = trick_objects
 
     db.add(new_pegue)
-    db.commit()
-    db.refresh(new_pegue)
+    await stats.record_pegues(db, [pegue_data], await trick_catalog.get(db))
+    await db.commit()
+    await db.refresh(new_pegue)
     return True
 
-@router.get("/", response_model=list[pegue_schemas.PegueOut])
-def list_pegues(db: Session = Depends(get_db)):
-    return db.query(pegue.Pegue).all()
+@router.post("/bulk", response_model=pegue_schemas.BulkResult)
+async def create_pegues_bulk(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Carga masiva de pegues (sincronización offline). El cuerpo es NDJSON (application/x-ndjson)
+    o un arreglo JSON de PegueCreate y se procesa a medida que llega.
+
+    Los trucos se validan contra el catálogo en memoria y los pegues válidos se insertan en lotes
+    de BULK_CHUNK_SIZE, cada uno en su propia transacción. Una fila inválida no frena al resto:
+    se informa en errors con su índice dentro del cuerpo (index -1 si el cuerpo entero quedó malformado).
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.split(";")[0].strip().lower() not in NDJSON_CONTENT_TYPES | JSON_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="Se espera application/x-ndjson o application/json")
+
+    catalog = await trick_catalog.get(db)
+    result = {"inserted": 0, "errors": []}
+    chunk = []
+
+    try:
+        async for index, item in iter_json_items(request.stream(), content_type):
+            if isinstance(item, ValueError):
+                result["errors"].append({"index": index, "detail": f"JSON inválido: {item}"})
+                continue
+            try:
+                pegue_data = pegue_schemas.PegueCreate.model_validate(item)
+            except ValidationError as exc:
+                result["errors"].append({"index": index, "detail": _format_validation_error(exc)})
+                continue
+
+            unknown = sorted(set(pegue_data.tricks_ids) - catalog.by_id.keys())
+            if unknown:
+                result["errors"].append({"index": index, "detail": f"Trucos inexistentes: {unknown}"})
+                continue
+
+            chunk.append((index, pegue_data))
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await _insert_chunk(db, chunk, result, catalog)
+                chunk = []
+    except StreamFormatError as exc:
+        # Lo ya insertado queda guardado; el resto del cuerpo no se puede leer
+        result["errors"].append({"index": -1, "detail": str(exc)})
+
+    if chunk:
+        await _insert_chunk(db, chunk, result, catalog)
+
+    result["errors"].sort(key=lambda error: error["index"])
+    return result
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc'])) or 'pegue'}: {error['msg']}" for error in exc.errors())
+
+async def _insert_chunk(db: AsyncSession, chunk, result, catalog):
+    # Usuarios inexistentes: una sola query por lote (SQLite no valida las FK por defecto)
+    user_ids = {pegue_data.user_id for _, pegue_data in chunk}
+    existing_users = set((await db.execute(select(user.User.id).filter(user.User.id.in_(user_ids)))).scalars())
+    rows = []
+    for index, pegue_data in chunk:
+        if pegue_data.user_id in existing_users:
+            rows.append((index, pegue_data))
+        else:
+            result["errors"].append({"index": index, "detail": "Usuario no encontrado"})
+    if not rows:
+        return
+
+    try:
+        pegues_data = [pegue_data for _, pegue_data in rows]
+        await _insert_pegues(db, pegues_data)
+        await stats.record_pegues(db, pegues_data, catalog)
+        await db.commit()
+        result["inserted"] += len(rows)
+    except SQLAlchemyError:
+        await db.rollback()
+        if len(rows) == 1:
+            result["errors"].append({"index": rows[0][0], "detail": "No se pudo guardar el pegue"})
+            return
+        # Camino lento sólo ante fallas: fila por fila para aislar la que rompe el lote
+        for row in rows:
+            await _insert_chunk(db, [row], result, catalog)
+
+async def _insert_pegues(db: AsyncSession, pegues_data: list[pegue_schemas.PegueCreate]):
+    """INSERT por lotes (executemany) de pegues y sus filas en pegue_trick, sin crear objetos del ORM."""
+    pegue_ids = (await db.scalars(
+        insert(pegue.Pegue).returning(pegue.Pegue.id, sort_by_parameter_order=True),
+        [
+            {
+                "user_id": pegue_data.user_id,
+                "equipment": pegue_data.equipment,
+                "date": pegue_data.date,
+                "duration": pegue_data.duration,
+                "notes": pegue_data.notes,
+            }
+            for pegue_data in pegues_data
+        ],
+    )).all()
+
+    links = [
+        {"pegue_id": pegue_id, "trick_id": trick_id, "date": pegue_data.date}
+        for pegue_id, pegue_data in zip(pegue_ids, pegues_data)
+        for trick_id in dict.fromkeys(pegue_data.tricks_ids)
+    ]
+    if links:
+        await db.execute(insert(pegue.pegue_trick_association), links)
+
+@router.get("/", response_model=pegue_schemas.PeguePage)
+async def list_pegues(limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+                cursor: str | None = None,
+                user_id: int | None = None,
+                date_from: datetime | None = None,
+                date_to: datetime | None = None,
+                equipment: str | None = None,
+                trick_id: int | None = None,
+                include: str = "tricks",
+                db: AsyncSession = Depends(get_read_db)):
+    """
+    Lista pegues paginados por cursor, del más reciente al más antiguo según (date, id).
+    date_from es inclusivo y date_to exclusivo. Cada filtro usa su índice compuesto
+    en pegue / pegue_trick, así que el costo de una página no depende del tamaño de la tabla.
+
+    include es una lista separada por comas; con include= (vacío) no se cargan los trucos.
+    Con trucos, una página cuesta 2 queries: la de pegues y una sola carga en lote de trucos.
+    """
+    includes = {part.strip() for part in include.split(",") if part.strip()}
+    if not includes <= INCLUDABLE:
+        raise HTTPException(status_code=400, detail=f"include inválido: {', '.join(sorted(includes - INCLUDABLE))}")
+    include_tricks = "tricks" in includes
+
+    query = select(pegue.Pegue)
+    if include_tricks:
+        query = query.options(selectinload(pegue.Pegue.tricks))
+    else:
+        query = query.options(noload(pegue.Pegue.tricks))
+
+    # Columnas del orden y del cursor. Con filtro por truco son las copias de pegue_trick: la página
+    # sale recorriendo ix_pegue_trick_trick_id_date_pegue_id en orden, sin ordenar todos los pegues del truco
+    order_date, order_id = pegue.Pegue.date, pegue.Pegue.id
+    if trick_id is not None:
+        pegue_trick = pegue.pegue_trick_association
+        query = query.join(pegue_trick, pegue_trick.c.pegue_id == pegue.Pegue.id).filter(pegue_trick.c.trick_id == trick_id)
+        order_date, order_id = pegue_trick.c.date, pegue_trick.c.pegue_id
+
+    if user_id is not None:
+        query = query.filter(pegue.Pegue.user_id == user_id)
+    if equipment is not None:
+        query = query.filter(pegue.Pegue.equipment == equipment)
+    if date_from is not None:
+        query = query.filter(order_date >= date_from)
+    if date_to is not None:
+        query = query.filter(order_date < date_to)
+
+    if cursor:
+        try:
+            cursor_date, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        query = query.filter(tuple_(order_date, order_id) < (cursor_date, cursor_id))
+
+    # Pedimos una fila de más para saber si existe una página siguiente
+    result = await db.execute(query.order_by(order_date.desc(), order_id.desc()).limit(limit + 1))
+    rows = result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+
+    if not include_tricks:
+        rows = [pegue_schemas.PegueOut.model_validate(row).model_copy(update={"tricks": None}) for row in rows]
+
+    return {"items": rows, "next_cursor": next_cursor}
@@ -1,19 +1,18 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import trick
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import trick as trick_schemas
+from app.utils.replicas import get_read_db
+from app.utils.trick_catalog import trick_catalog, etag_matches
 
 router = APIRouter()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/", response_model=list[trick_schemas.TrickOut])
-def list_tricks(db: Session = Depends(get_db)):
-    return db.query(trick.Trick).all()
+async def list_tricks(request: Request, db: AsyncSession = Depends(get_read_db)):
+    # El catálogo casi nunca cambia: se sirve el cuerpo ya serializado y se responde 304 si el cliente lo tiene
+    catalog = await trick_catalog.get(db)
+    headers = {"ETag": catalog.etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), catalog.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=catalog.body, media_type="application/json", headers=headers)
@@ -1,24 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 import re
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import user
-from app.schemas import user as user_schemas
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SessionLocal, get_db
+from app.models import pegue, user
+from app.schemas import user as user_schemas, stats as stats_schemas
 from app import auth 
+from app.utils import activity, recommendations, stats
+from app.utils.export import iter_logbook, ndjson_lines, csv_lines
+from app.utils.leaderboards import leaderboards
+from app.utils.replicas import get_read_db
+from app.utils.trick_catalog import trick_catalog
 
 router = APIRouter()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def normalize_email(email: str) -> str:
+    # Los emails se guardan así (migración 0005): el login busca por igualdad y usa el índice único
+    return email.strip().lower()
 
 @router.post("/", response_model=user_schemas.UserOut)
-def create_user(user_data: user_schemas.UserCreate, db: Session = Depends(get_db)):
-    email_normalized = user_data.email.strip().lower()
+async def create_user(user_data: user_schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    email_normalized = normalize_email(user_data.email)
     name_clean = user_data.name.strip()
     password = user_data.password
 
@@ -38,29 +44,29 @@ def create_user(user_data: user_schemas.UserCreate, db: Session = Depends(get_db
     if len(password) > MAX_PASSWORD_LENGTH:
         raise HTTPException(status_code=400, detail=f"Password too long (max {MAX_PASSWORD_LENGTH} characters)")
 
-    existing_user = db.query(user.User).filter(user.User.email == email_normalized).first()
+    existing_user = await db.scalar(select(user.User).filter(user.User.email == email_normalized))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = user.User(
         name=name_clean,
         email=email_normalized,
-        password=auth.hash_password(password)  
+        password=await auth.hash_password(password)  
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @router.put("/update/{user_id}", response_model=user_schemas.UserOut)
-def update_user(user_id: int, user_data: user_schemas.UserUpdate, 
-                db: Session = Depends(get_db),
-                current_user: user.User = Depends(auth.get_current_user)):
+async def update_user(user_id: int, user_data: user_schemas.UserUpdate, 
+                db: AsyncSession = Depends(get_db),
+                current_user: auth.Principal = Depends(auth.get_current_user)):
     # Sólo el dueño puede actualizar su cuenta
     if current_user.id != user_id:
         raise HTTPException(status_code=403, detail="No autorizado")
     
-    db_user = db.query(user.User).filter(user.User.id == user_id).first()
+    db_user = await db.scalar(select(user.User).filter(user.User.id == user_id))
 
     if not db_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -70,41 +76,52 @@ def update_user(user_id: int, user_data: user_schemas.UserUpdate,
         if not user_data.currentPassword:
             raise HTTPException(status_code=400, detail="Debes ingresar la contraseña actual para cambiarla")
 
-        if not auth.verify_password(user_data.currentPassword, db_user.password):
+        if not await auth.verify_password(user_data.currentPassword, db_user.password):
             raise HTTPException(status_code=401, detail="La contraseña actual no es correcta")
 
-        db_user.password = auth.hash_password(user_data.newPassword)
+        db_user.password = await auth.hash_password(user_data.newPassword)
 
     # Actualizar otros campos
     if user_data.name:
         db_user.name = user_data.name
 
     if user_data.email:
-        db_user.email = user_data.email
-
-    db.commit()
-    db.refresh(db_user)
+        # Normalizado como en create_user, y con el mismo chequeo de duplicados: sin él un email
+        # que sólo difiere en mayúsculas de otra cuenta llega al índice único y termina en un 500
+        email_normalized = normalize_email(user_data.email)
+        existing_user = await db.scalar(
+            select(user.User).filter(user.User.email == email_normalized, user.User.id != user_id)
+        )
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        db_user.email = email_normalized
+
+    await db.commit()
+    await db.refresh(db_user)
+    auth.invalidate_principal(user_id)
+    leaderboards.rename(user_id, db_user.name)
     return db_user
 
-@router.get("/", response_model=list[user_schemas.UserOut])
-def list_users(db: Session = Depends(get_db)):
-    return db.query(user.User).all()
+@router.get("/", response_model=list[user_schemas.UserOut], response_class=ORJSONResponse)
+async def list_users(db: AsyncSession = Depends(get_read_db)):
+    # Sólo las columnas de UserOut (ni el hash ni created_at), sin armar objetos del ORM.
+    # Se devuelve la respuesta ya armada: las filas ya tienen la forma de UserOut y volver a
+    # validar cada EmailStr era la mayor parte del costo de la lista
+    result = await db.execute(select(user.User.id, user.User.name, user.User.email).order_by(user.User.id))
+    return ORJSONResponse([row._asdict() for row in result])
 
 @router.post("/login", response_model=user_schemas.LoginResponse)
-def login_user(login_data: user_schemas.UserLogin, db: Session = Depends(get_db)):
-    # Normalize email (convert to lowercase)
-    normalized_email = login_data.email.strip().lower()
-    
-    # Buscar usuario por email (case-insensitive)
-    user_obj = db.query(user.User).filter(
-        user.User.email.ilike(normalized_email)
-    ).first()
+async def login_user(login_data: user_schemas.UserLogin, db: AsyncSession = Depends(get_db)):
+    # Los emails se guardan normalizados: igualdad exacta, que usa el índice único de users.email
+    # (ilike no puede usarlo en PostgreSQL y recorría la tabla en cada login)
+    normalized_email = normalize_email(login_data.email)
+    user_obj = await db.scalar(select(user.User).filter(user.User.email == normalized_email))
     
     if not user_obj:
         raise HTTPException(status_code=401, detail="Email no encontrado")
     
     # Verificar password hasheado
-    if not auth.verify_password(login_data.password, user_obj.password):
+    if not await auth.verify_password(login_data.password, user_obj.password):
         raise HTTPException(status_code=401, detail="Contraseña incorrecta")
 
     # Crear token JWT (sub = id)
@@ -116,33 +133,116 @@ def login_user(login_data: user_schemas.UserLogin, db: Session = Depends(get_db)
         "token": access_token
     }
 
-@router.get("/{user_id}", response_model=user_schemas.UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db),
-             current_user: user.User = Depends(auth.get_current_user)):
+@router.get("/{user_id}", response_model=user_schemas.UserOut, response_class=ORJSONResponse)
+async def get_user(user_id: int,
+                   current_user: auth.Principal = Depends(auth.get_current_user)):
     # Solo el dueño puede acceder a su información
     if current_user.id != user_id:
         raise HTTPException(status_code=403, detail="No autorizado")
-    
-    # Buscar el usuario por ID
-    db_user = db.query(user.User).filter(user.User.id == user_id).first()
 
-    if not db_user:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-    return db_user
+    # get_current_user ya resolvió este mismo usuario (desde la caché o con su única query);
+    # Principal es un dataclass con los campos de UserOut y orjson lo serializa directo
+    return ORJSONResponse(current_user)
 
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int,db: Session = Depends(get_db),
-                current_user: user.User = Depends(auth.get_current_user)):
+async def delete_user(user_id: int,db: AsyncSession = Depends(get_db),
+                current_user: auth.Principal = Depends(auth.get_current_user)):
     if current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    db_user = db.query(user.User).filter(user.User.id == user_id).first()
+    db_user = await db.scalar(select(user.User).filter(user.User.id == user_id))
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    db.delete(db_user)
-    db.commit()
+    await stats.forget_user(db, user_id)
+    # pegue.user_id es NOT NULL: los pegues del usuario (y sus trucos) se borran con él, en la misma transacción
+    user_pegues = select(pegue.Pegue.id).filter(pegue.Pegue.user_id == user_id)
+    await db.execute(delete(pegue.pegue_trick_association)
+                     .filter(pegue.pegue_trick_association.c.pegue_id.in_(user_pegues)))
+    await db.execute(delete(pegue.Pegue).filter(pegue.Pegue.user_id == user_id))
+    await db.delete(db_user)
+    await db.commit()
+    auth.invalidate_principal(user_id)
 
     return {"detail": "User deleted"}
+
+
+@router.get("/{user_id}/pegues/export")
+async def export_pegues(user_id: int, format: Literal["ndjson", "csv"] = "ndjson",
+                        current_user: auth.Principal = Depends(auth.get_current_user)):
+    # Solo el dueño puede descargar su bitácora
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    # La sesión se abre dentro del generador: tiene que vivir mientras dure el streaming
+    records = iter_logbook(SessionLocal, user_id)
+    if format == "csv":
+        body, media_type = csv_lines(records), "text/csv"
+    else:
+        body, media_type = ndjson_lines(records), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="pegues-{user_id}.{format}"'},
+    )
+
+
+@router.get("/{user_id}/stats", response_model=stats_schemas.UserStatsOut)
+async def get_user_stats(user_id: int, db: AsyncSession = Depends(get_db),
+                         current_user: auth.Principal = Depends(auth.get_current_user)):
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    # Se lee el resumen mantenido al escribir: el costo no depende de la cantidad de pegues
+    totals, equipment, tricks = await stats.get_user_stats(db, user_id)
+    catalog = await trick_catalog.get(db)
+
+    trick_frequency = [
+        {**catalog.by_id[trick_id].model_dump(), "count": count}
+        for trick_id, count in tricks if trick_id in catalog.by_id
+    ]
+    trick_frequency.sort(key=lambda item: (-item["count"], item["id"]))
+
+    return {
+        "total_sessions": totals.total_sessions if totals else 0,
+        "total_duration": totals.total_duration if totals else 0,
+        "sessions_by_equipment": dict(equipment),
+        "trick_frequency": trick_frequency,
+        "highest_level": totals.max_level if totals and totals.max_level else None,
+    }
+
+
+@router.get("/{user_id}/activity", response_model=stats_schemas.ActivityOut)
+async def get_user_activity(user_id: int,
+                            date_from: date | None = Query(None, alias="from"),
+                            date_to: date | None = Query(None, alias="to"),
+                            bucket: Literal["day", "week", "month"] = "day",
+                            db: AsyncSession = Depends(get_db),
+                            current_user: auth.Principal = Depends(auth.get_current_user)):
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' no puede ser posterior a 'to'")
+
+    # La serie diaria queda en caché hasta que el usuario registre otro pegue
+    series = await activity.get_daily_series(db, user_id)
+    return {"bucket": bucket, "items": activity.bucketize(series, bucket, date_from, date_to)}
+
+
+@router.get("/{user_id}/recommendations", response_model=list[stats_schemas.Recommendation])
+async def get_recommendations(user_id: int, limit: int = Query(5, ge=1, le=20),
+                              db: AsyncSession = Depends(get_db),
+                              current_user: auth.Principal = Depends(auth.get_current_user)):
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    # Una lectura del resumen del usuario; el ranking sale de la matriz en memoria
+    landed = await recommendations.landed_tricks(db, user_id)
+    catalog = await trick_catalog.get(db)
+    return [
+        {**catalog.by_id[trick_id].model_dump(), "score": score}
+        for trick_id, score in recommendations.cooccurrence.recommend(landed, limit)
+        if trick_id in catalog.by_id
+    ]
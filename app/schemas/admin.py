@@ -0,0 +1,21 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+
+class SlowQueryOut(BaseModel):
+    at: datetime
+    duration_ms: float
+    route: str | None
+    statement: str
+    parameters: str
+    plan: list[str]
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ProfileReportOut(BaseModel):
+    id: str
+    route: str
+    path: str
+    status: int
+    duration_ms: float
+    db_queries: int | None
+    db_time_ms: float | None
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    name: str
+    score: int
+
+class LeaderboardOut(BaseModel):
+    metric: str
+    entries: list[LeaderboardEntry]
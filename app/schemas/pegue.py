@@ -17,6 +17,18 @@ class PegueOut(BaseModel):
     date: datetime
     duration: int
     notes: str
-    tricks: list[TrickOut]
+    tricks: list[TrickOut] | None = None  # None cuando no se pidió include=tricks
 
     model_config = ConfigDict(from_attributes=True)
+
+class PeguePage(BaseModel):
+    items: list[PegueOut]
+    next_cursor: str | None = None
+
+class BulkRowError(BaseModel):
+    index: int
+    detail: str
+
+class BulkResult(BaseModel):
+    inserted: int
+    errors: list[BulkRowError]
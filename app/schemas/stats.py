@@ -0,0 +1,30 @@
+from datetime import date
+from pydantic import BaseModel
+
+class TrickFrequency(BaseModel):
+    id: int
+    name: str
+    level: int
+    count: int
+
+class UserStatsOut(BaseModel):
+    total_sessions: int
+    total_duration: int
+    sessions_by_equipment: dict[str, int]
+    trick_frequency: list[TrickFrequency]
+    highest_level: int | None
+
+class Recommendation(BaseModel):
+    id: int
+    name: str
+    level: int
+    score: float
+
+class ActivityBucket(BaseModel):
+    start: date  # primer día del bucket
+    minutes: int
+    sessions: int
+
+class ActivityOut(BaseModel):
+    bucket: str
+    items: list[ActivityBucket]  # sólo los buckets con actividad, en orden cronológico
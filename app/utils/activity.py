@@ -0,0 +1,88 @@
+import os
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models.stats import UserDailyActivity
+from app.utils.cache import TTLCache
+
+ACTIVITY_CACHE_SIZE = int(os.getenv("ACTIVITY_CACHE_SIZE", "1000"))
+# Tope de vida de una serie cacheada: otro worker puede haber registrado pegues del usuario
+ACTIVITY_CACHE_TTL_SECONDS = float(os.getenv("ACTIVITY_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class DailySeries:
+    """Actividad diaria de un usuario como arreglos paralelos, ordenados por día."""
+    days: np.ndarray      # datetime64[D]
+    minutes: np.ndarray   # int64
+    sessions: np.ndarray  # int64
+
+
+activity_cache = TTLCache(ACTIVITY_CACHE_SIZE, ACTIVITY_CACHE_TTL_SECONDS)
+
+
+async def get_daily_series(db, user_id: int) -> DailySeries:
+    series = activity_cache.get(user_id)
+    if series is None:
+        rows = (await db.execute(
+            select(UserDailyActivity.day, UserDailyActivity.minutes, UserDailyActivity.sessions)
+            .filter(UserDailyActivity.user_id == user_id)
+            .order_by(UserDailyActivity.day)
+        )).all()
+        series = DailySeries(
+            days=np.array([row.day for row in rows], dtype="datetime64[D]"),
+            minutes=np.array([row.minutes for row in rows], dtype=np.int64),
+            sessions=np.array([row.sessions for row in rows], dtype=np.int64),
+        )
+        activity_cache.set(user_id, series)
+    return series
+
+
+def bucketize(series: DailySeries, bucket: str, date_from: date | None = None, date_to: date | None = None):
+    """
+    Agrupa la serie diaria en buckets de día, semana (empieza el lunes) o mes, sólo con los días
+    dentro de [date_from, date_to]. Devuelve únicamente los buckets con actividad.
+    """
+    days = series.days
+    start = 0 if date_from is None else np.searchsorted(days, np.datetime64(date_from, "D"), side="left")
+    stop = len(days) if date_to is None else np.searchsorted(days, np.datetime64(date_to, "D"), side="right")
+    days, minutes, sessions = days[start:stop], series.minutes[start:stop], series.sessions[start:stop]
+    if not len(days):
+        return []
+
+    if bucket == "week":
+        keys = days - (days.astype(np.int64) + 3) % 7  # el 1970-01-01 fue jueves
+    elif bucket == "month":
+        keys = days.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        keys = days
+
+    # Los días vienen ordenados, así que cada bucket es un tramo contiguo
+    boundaries = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return [
+        {"start": bucket_start, "minutes": bucket_minutes, "sessions": bucket_sessions}
+        for bucket_start, bucket_minutes, bucket_sessions in zip(
+            keys[boundaries].tolist(),
+            np.add.reduceat(minutes, boundaries).tolist(),
+            np.add.reduceat(sessions, boundaries).tolist(),
+        )
+    ]
+
+
+# --- Invalidación ---
+def mark_changed(db, user_ids):
+    """Anota los usuarios con pegues nuevos; su serie se descarta recién cuando la transacción hace commit."""
+    db.info.setdefault("activity_changed", set()).update(user_ids)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop("activity_changed", ()):
+        activity_cache.pop(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop("activity_changed", None)
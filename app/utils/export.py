@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from app.models import pegue, trick
+
+EXPORT_BATCH_SIZE = 1000
+CSV_COLUMNS = ["id", "date", "equipment", "duration", "notes", "tricks"]
+
+
+def logbook_query(user_id: int):
+    """Pegues del usuario con el nombre de cada truco, una fila por (pegue, truco), en orden (date, id)."""
+    return (
+        select(
+            pegue.Pegue.id,
+            pegue.Pegue.date,
+            pegue.Pegue.equipment,
+            pegue.Pegue.duration,
+            pegue.Pegue.notes,
+            trick.Trick.name.label("trick_name"),
+        )
+        .outerjoin(pegue.pegue_trick_association, pegue.pegue_trick_association.c.pegue_id == pegue.Pegue.id)
+        .outerjoin(trick.Trick, trick.Trick.id == pegue.pegue_trick_association.c.trick_id)
+        .filter(pegue.Pegue.user_id == user_id)
+        .order_by(pegue.Pegue.date, pegue.Pegue.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+async def iter_logbook(session_factory, user_id: int):
+    """
+    Recorre la bitácora con un cursor del lado del servidor (yield_per) y arma un dict por pegue.
+    La memoria usada depende del tamaño del lote, no de la cantidad de pegues del usuario.
+    """
+    async with session_factory() as db:
+        result = await db.stream(logbook_query(user_id))
+        current = None
+        async for partition in result.partitions():
+            for row in partition:
+                if current is None or current["id"] != row.id:
+                    if current is not None:
+                        yield current
+                    current = {
+                        "id": row.id,
+                        "date": row.date.isoformat(),
+                        "equipment": row.equipment,
+                        "duration": row.duration,
+                        "notes": row.notes,
+                        "tricks": [],
+                    }
+                if row.trick_name is not None:
+                    current["tricks"].append(row.trick_name)
+        if current is not None:
+            yield current
+
+
+async def ndjson_lines(records):
+    lines = []
+    async for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+async def csv_lines(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    count = 0
+    async for record in records:
+        writer.writerow({**record, "tricks": "|".join(record["tricks"])})
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,72 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+
+# Funciones que corren dentro de los procesos del pool (deben ser picklables, a nivel de módulo)
+def hash_sync(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_sync(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+class HashPoolFull(Exception):
+    """La cola del pool de hashing está llena; el llamador debe responder 503."""
+
+
+class HashPool:
+    """
+    Pool de procesos para Argon2 con cola acotada.
+
+    Acepta como máximo workers + queue_size trabajos a la vez (corriendo + esperando).
+    Por encima de eso run() lanza HashPoolFull en lugar de encolar, para que una ráfaga
+    de logins no bloquee el event loop ni el resto de los endpoints.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: el proceso padre ya tiene hilos (drivers async), fork no es seguro
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.capacity:
+            raise HashPoolFull()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # Murió un worker (OOM, crash): ese executor ya no acepta trabajos. Se descarta
+                # y se reintenta una vez con uno nuevo; hashear o verificar se puede repetir
+                self._discard(executor)
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        # Otra llamada concurrente puede haberlo reemplazado ya
+        if self._executor is executor:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
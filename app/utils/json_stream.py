@@ -0,0 +1,150 @@
+import codecs
+import json
+from typing import AsyncIterator
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+JSON_CONTENT_TYPES = {"application/json"}
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class StreamFormatError(ValueError):
+    """El cuerpo no es NDJSON ni un arreglo JSON; no se puede seguir leyendo."""
+
+
+async def iter_json_items(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[tuple[int, object]]:
+    """
+    Recorre un cuerpo NDJSON o un arreglo JSON a medida que llega, sin cargarlo entero en memoria.
+
+    Produce (índice, valor) por cada elemento; si un elemento no es JSON válido produce
+    (índice, ValueError) y sigue con el siguiente.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        async for item in _iter_ndjson(chunks):
+            yield item
+    elif media_type in JSON_CONTENT_TYPES:
+        async for item in _iter_array(chunks):
+            yield item
+    else:
+        raise StreamFormatError(f"Content-Type no soportado: {media_type or 'vacío'}")
+
+
+async def _iter_ndjson(chunks):
+    index = 0
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, _loads(line)
+                index += 1
+    if pending.strip():
+        yield index, _loads(pending)
+
+
+def _loads(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as exc:  # JSONDecodeError o UnicodeDecodeError
+        return exc
+
+
+async def _iter_array(chunks):
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    index = 0
+    state = "start"  # start -> value -> separator -> value ... -> end
+    scanner = _ElementScanner()
+
+    async def more() -> bool:
+        nonlocal buffer, pos
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            return False
+        # Se descarta lo ya consumido para que el buffer no crezca con el tamaño del cuerpo
+        buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            if await more():
+                continue
+            if state != "end":
+                raise StreamFormatError("El arreglo JSON está incompleto")
+            return
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                raise StreamFormatError("Se esperaba un arreglo JSON")
+            pos += 1
+            state = "first"
+        elif state in ("first", "value"):
+            if state == "first" and char == "]":
+                pos += 1
+                state = "end"
+                continue
+            # Sólo se lee más mientras el elemento actual no terminó: un elemento malformado no
+            # arrastra el resto del cuerpo y los siguientes se siguen procesando
+            end = scanner.find_end(buffer, pos)
+            if end is None:
+                if await more():
+                    continue
+                raise StreamFormatError("El arreglo JSON está incompleto")
+            scanner.reset()
+            yield index, _loads(buffer[pos:end])
+            index += 1
+            pos = end
+            state = "separator"
+        elif state == "separator":
+            if char not in ",]":
+                raise StreamFormatError(f"Carácter inesperado {char!r} después del elemento {index - 1}")
+            pos += 1
+            state = "value" if char == "," else "end"
+        else:
+            raise StreamFormatError("Hay datos después del final del arreglo JSON")
+
+
+class _ElementScanner:
+    """
+    Busca dónde termina un elemento del arreglo: la próxima "," o "]" fuera de strings y al mismo
+    nivel de anidamiento. Recuerda hasta dónde leyó para no volver a recorrer el elemento con cada chunk.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.scanned = 0  # caracteres ya recorridos desde el inicio del elemento
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def find_end(self, buffer: str, start: int) -> int | None:
+        for i in range(start + self.scanned, len(buffer)):
+            char = buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+            elif char in "]}" and self.depth > 0:
+                self.depth -= 1
+            elif char in ",]" and self.depth == 0:
+                return i
+        self.scanned = len(buffer) - start
+        return None
@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import logging
+import os
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import user
+from app.models.stats import UserStats, UserDailyActivity
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+LEADERBOARD_RECENT_DAYS = int(os.getenv("LEADERBOARD_RECENT_DAYS", "30"))
+# Cada worker sólo ve sus propias escrituras: se recarga desde los resúmenes cada tanto
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "60"))
+
+METRICS = ("level", "duration", "recent")
+
+
+def _rank_key(entry):
+    user_id, score = entry
+    return score, -user_id  # mayor puntaje primero; a igual puntaje, el id más bajo
+
+
+class Leaderboard:
+    """
+    Puntajes de todos los usuarios más el top-K ya ordenado.
+
+    Subir un puntaje cuesta O(K); sólo cuando alguien del top baja o desaparece se vuelve
+    a elegir el top entre todos los puntajes.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.scores: dict[int, int] = {}
+        self._top: list[tuple[int, int]] = []
+
+    def load(self, scores: dict[int, int]):
+        self.scores = scores
+        self._refill()
+
+    def set(self, user_id: int, score: int):
+        previous = self.scores.get(user_id)
+        self.scores[user_id] = score
+        in_top = any(entry_user == user_id for entry_user, _ in self._top)
+
+        qualifies = score > 0 and (len(self._top) < self.size or _rank_key((user_id, score)) > _rank_key(self._top[-1]))
+
+        if in_top and previous is not None and score < previous:
+            self._refill()
+        elif in_top or qualifies:
+            self._top = [entry for entry in self._top if entry[0] != user_id]
+            self._top.append((user_id, score))
+            self._top.sort(key=_rank_key, reverse=True)
+            del self._top[self.size:]
+
+    def remove(self, user_id: int):
+        if self.scores.pop(user_id, None) is not None:
+            if any(entry_user == user_id for entry_user, _ in self._top):
+                self._refill()
+
+    def top(self, limit: int) -> list[tuple[int, int]]:
+        return self._top[:limit]
+
+    def _refill(self):
+        positive = ((user_id, score) for user_id, score in self.scores.items() if score > 0)
+        self._top = heapq.nlargest(self.size, positive, key=_rank_key)
+
+
+class Leaderboards:
+    """
+    Rankings de nivel máximo, tiempo total en la cinta y sesiones en los últimos días, en memoria.
+
+    Se cargan desde user_stats / user_daily_activity (nunca desde pegue) y después se actualizan
+    con cada commit que registra pegues o borra un usuario.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE, recent_days: int = LEADERBOARD_RECENT_DAYS, today=date.today):
+        self.boards = {metric: Leaderboard(size) for metric in METRICS}
+        self.names: dict[int, str] = {}
+        self.recent_days = recent_days
+        self._today = today
+        self._recent_by_day: dict[date, Counter] = {}
+        self._window_start = self._current_window_start()
+
+    def _current_window_start(self) -> date:
+        return self._today() - timedelta(days=self.recent_days - 1)
+
+    async def rebuild(self, db):
+        window_start = self._current_window_start()
+        totals = (await db.execute(
+            select(UserStats.user_id, UserStats.total_duration, UserStats.max_level, user.User.name)
+            .join(user.User, user.User.id == UserStats.user_id)
+        )).all()
+        daily = (await db.execute(
+            select(UserDailyActivity.user_id, UserDailyActivity.day, UserDailyActivity.sessions)
+            .filter(UserDailyActivity.day >= window_start)
+        )).all()
+
+        recent_by_day: dict[date, Counter] = {}
+        recent = Counter()
+        for user_id, day, sessions in daily:
+            recent_by_day.setdefault(day, Counter())[user_id] += sessions
+            recent[user_id] += sessions
+
+        self.names = {row.user_id: row.name for row in totals}
+        self.boards["level"].load({row.user_id: row.max_level for row in totals})
+        self.boards["duration"].load({row.user_id: row.total_duration for row in totals})
+        self.boards["recent"].load(dict(recent))
+        self._recent_by_day = recent_by_day
+        self._window_start = window_start
+
+    def top(self, metric: str, limit: int) -> list[dict]:
+        if metric == "recent":
+            self._expire_recent()
+        return [
+            {"rank": rank, "user_id": user_id, "name": self.names.get(user_id, ""), "score": score}
+            for rank, (user_id, score) in enumerate(self.boards[metric].top(limit), start=1)
+        ]
+
+    def record(self, totals: dict, daily: dict, names: dict[int, str]):
+        """Aplica lo que registró record_pegues: totals por usuario y sesiones por (usuario, día)."""
+        self.names.update(names)
+        self._expire_recent()
+        level, duration, recent = self.boards["level"], self.boards["duration"], self.boards["recent"]
+        for user_id, values in totals.items():
+            duration.set(user_id, duration.scores.get(user_id, 0) + values["total_duration"])
+            if values["max_level"] > level.scores.get(user_id, 0):
+                level.set(user_id, values["max_level"])
+        for (user_id, day), values in daily.items():
+            if day >= self._window_start:
+                self._recent_by_day.setdefault(day, Counter())[user_id] += values["sessions"]
+                recent.set(user_id, recent.scores.get(user_id, 0) + values["sessions"])
+
+    def remove(self, user_id: int):
+        self.names.pop(user_id, None)
+        for day_counts in self._recent_by_day.values():
+            day_counts.pop(user_id, None)
+        for board in self.boards.values():
+            board.remove(user_id)
+
+    def rename(self, user_id: int, name: str):
+        if user_id in self.names:
+            self.names[user_id] = name
+
+    def _expire_recent(self):
+        """Descuenta los días que salieron de la ventana (una vez por día, no por request)."""
+        window_start = self._current_window_start()
+        if window_start <= self._window_start:
+            return
+        self._window_start = window_start
+        expired = [day for day in self._recent_by_day if day < window_start]
+        if not expired:
+            return
+        board = self.boards["recent"]
+        for day in expired:
+            for user_id, sessions in self._recent_by_day.pop(day).items():
+                board.scores[user_id] = board.scores.get(user_id, 0) - sessions
+        board.load({user_id: score for user_id, score in board.scores.items() if score > 0})
+
+
+leaderboards = Leaderboards()
+
+
+async def reload(session_factory):
+    try:
+        async with session_factory() as db:
+            await leaderboards.rebuild(db)
+    except SQLAlchemyError as e:
+        # Se siguen sirviendo los rankings anteriores; se reintenta en la próxima recarga
+        logger.error("Error al recargar los rankings: %s", e)
+
+
+async def refresh_forever(session_factory, interval: float = LEADERBOARD_REFRESH_SECONDS):
+    """Tarea de fondo del lifespan: recarga los rankings desde los resúmenes cada `interval` segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        await reload(session_factory)
+
+
+# --- Actualización después del commit ---
+async def track_recorded(db, totals: dict, daily: dict):
+    """Deja anotados los pegues registrados en la transacción; se aplican cuando hace commit."""
+    missing = [user_id for user_id in totals if user_id not in leaderboards.names]
+    names = {}
+    if missing:
+        names = dict((await db.execute(select(user.User.id, user.User.name).filter(user.User.id.in_(missing)))).all())
+    db.info.setdefault("leaderboard_changes", []).append(("record", (dict(totals), dict(daily), names)))
+
+def track_removed(db, user_id: int):
+    db.info.setdefault("leaderboard_changes", []).append(("remove", (user_id,)))
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    for method, args in session.info.pop("leaderboard_changes", ()):
+        getattr(leaderboards, method)(*args)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop("leaderboard_changes", None)
@@ -0,0 +1,104 @@
+"""
+Métricas en formato Prometheus: latencia y status por ruta, queries y tiempo de base por request,
+y tiempo de Argon2. Con varios workers, definir PROMETHEUS_MULTIPROC_DIR (ver prometheus_client).
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latencia de las requests HTTP", ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests HTTP por status", ["method", "route", "status"],
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request", "Queries SQL ejecutadas por request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME = Histogram(
+    "db_time_per_request_seconds", "Tiempo total en la base por request", ["method", "route"],
+)
+PASSWORD_HASHING = Histogram(
+    "password_hashing_seconds", "Tiempo de Argon2 visto por la request (incluye la espera en el pool)", ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+UNMATCHED_ROUTE = "<unmatched>"  # 404: no se usa el path crudo como label para no explotar la cardinalidad
+
+
+class RequestDbStats:
+    __slots__ = ("scope", "queries", "seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Request en curso; los eventos del engine (app/database.py) le suman cada query
+current_request: ContextVar[RequestDbStats | None] = ContextVar("current_request", default=None)
+
+
+def record_query(seconds: float):
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += seconds
+
+
+def current_route() -> str | None:
+    """Método y template de la ruta de la request en curso (None fuera de una request)."""
+    stats = current_request.get()
+    if stats is None:
+        return None
+    route = stats.scope.get("route")
+    return f"{stats.scope['method']} {route.path if route is not None else stats.scope['path']}"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI puro (sin BaseHTTPMiddleware): no agrega una task por request ni bufferiza el body."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # si la app levanta una excepción, ServerErrorMiddleware responde 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        db_stats = RequestDbStats(scope)
+        token = current_request.set(db_stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            # El router deja la ruta matcheada en el scope: se usa el template (/users/{user_id})
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else UNMATCHED_ROUTE)
+            REQUEST_LATENCY.labels(*labels).observe(elapsed)
+            REQUESTS.labels(*labels, str(status_code)).inc()
+            DB_QUERIES.labels(*labels).observe(db_stats.queries)
+            DB_TIME.labels(*labels).observe(db_stats.seconds)
+
+
+def render_latest() -> tuple[bytes, str]:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
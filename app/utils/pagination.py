@@ -0,0 +1,19 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(date: datetime, row_id: int) -> str:
+    """Codifica la posición (date, id) de la última fila de una página como un cursor opaco."""
+    raw = json.dumps([date.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverso de encode_cursor. Lanza ValueError si el cursor no es válido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(date_str), int(row_id)
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
@@ -0,0 +1,134 @@
+"""
+Perfilado de requests puntuales en producción con cProfile.
+
+Se perfila una request si trae `X-Profile: <ADMIN_TOKEN>` o si cae en la muestra de
+PROFILE_SAMPLE_RATE. El reporte (call tree en texto + .prof para snakeviz/pstats) queda en
+PROFILE_DIR, que nunca guarda más de PROFILE_MAX_REPORTS, y se lee desde /admin/profiles.
+
+cProfile mide el hilo del event loop: mientras la request espera, también aparece lo que hacen
+otras tasks. Por eso se perfila una sola request a la vez por worker. Argon2 corre en otro proceso
+y se ve como la espera en HashPool.run; su tiempo está en la métrica password_hashing_seconds.
+"""
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app import auth
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "./profiles"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", "50"))
+PROFILE_TOP_FUNCTIONS = 60
+
+REPORT_ID = re.compile(r"^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$")
+
+
+def _requested(scope) -> bool:
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return True
+    if not auth.ADMIN_TOKEN:
+        return False
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return secrets.compare_digest(value, auth.ADMIN_TOKEN.encode())
+    return False
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI: envuelve la request en cProfile cuando se pide y guarda el reporte al terminar."""
+
+    def __init__(self, app):
+        self.app = app
+        self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._active or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        report_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_with_report_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", report_id.encode())]}
+            await send(message)
+
+        self._active = True
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_report_id)
+        finally:
+            profiler.disable()
+            self._active = False
+            elapsed = time.perf_counter() - start
+            db_stats = metrics.current_request.get()
+            meta = {
+                "id": report_id,
+                "route": metrics.current_route() or f"{scope['method']} {scope['path']}",
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 3),
+                "db_queries": db_stats.queries if db_stats else None,
+                "db_time_ms": round(db_stats.seconds * 1000, 3) if db_stats else None,
+            }
+            try:
+                # pstats y el disco, fuera del event loop
+                await asyncio.to_thread(write_report, PROFILE_DIR, profiler, meta)
+            except OSError as e:
+                logger.error("Error al guardar el perfil %s: %s", report_id, e)
+
+
+def write_report(directory: Path, profiler: cProfile.Profile, meta: dict):
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f"{meta['id']}.prof")
+
+    out = io.StringIO()
+    out.write(json.dumps(meta) + "\n\n")
+    stats = pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative")
+    stats.print_stats(PROFILE_TOP_FUNCTIONS)
+    stats.print_callees(PROFILE_TOP_FUNCTIONS)
+    (directory / f"{meta['id']}.txt").write_text(out.getvalue(), encoding="utf-8")
+
+    # Directorio acotado: los ids empiezan con la fecha, así que el orden alfabético es el cronológico
+    reports = sorted(directory.glob("*.txt"))
+    for old in reports[:-PROFILE_MAX_REPORTS]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def list_reports(directory: Path) -> list[dict]:
+    """Metadatos de los reportes guardados (primera línea de cada .txt), el más reciente primero."""
+    reports = []
+    for path in sorted(directory.glob("*.txt"), reverse=True):
+        try:
+            with path.open(encoding="utf-8") as report:
+                reports.append(json.loads(report.readline()))
+        except (OSError, ValueError):
+            continue  # borrado por otro worker mientras se listaba, o a medio escribir
+    return reports
+
+
+def report_path(directory: Path, report_id: str, suffix: str) -> Path | None:
+    if not REPORT_ID.match(report_id):
+        return None
+    path = directory / f"{report_id}{suffix}"
+    return path if path.is_file() else None
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.stats import TrickCooccurrence, UserTrickStats
+from app.utils.trick_catalog import trick_catalog
+
+logger = logging.getLogger(__name__)
+
+# La matriz de cada worker sólo suma sus propios commits: se recarga de trick_cooccurrence cada tanto
+RECOMMENDATIONS_REFRESH_SECONDS = float(os.getenv("RECOMMENDATIONS_REFRESH_SECONDS", "300"))
+# A igual afinidad desempata la popularidad del truco; sin pegues con trucos es lo único que queda
+POPULARITY_WEIGHT = 1e-3
+
+
+class CooccurrenceMatrix:
+    """
+    Matriz truco × truco con la cantidad de pegues en que aparecen juntos; la diagonal cuenta
+    los pegues de cada truco. Se carga de trick_cooccurrence y se suma en memoria con cada commit.
+    """
+
+    def __init__(self):
+        self.trick_ids = np.zeros(0, dtype=np.int64)
+        self.levels = np.zeros(0, dtype=np.int64)
+        self.index: dict[int, int] = {}
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+
+    async def rebuild(self, db):
+        catalog = await trick_catalog.get(db)
+        trick_ids = np.array([t.id for t in catalog.tricks], dtype=np.int64)
+        index = {int(trick_id): position for position, trick_id in enumerate(trick_ids)}
+        counts = np.zeros((len(trick_ids), len(trick_ids)), dtype=np.int64)
+
+        rows = (await db.execute(select(TrickCooccurrence.trick_a, TrickCooccurrence.trick_b, TrickCooccurrence.pegues))).all()
+        pairs = [(index[a], index[b], n) for a, b, n in rows if a in index and b in index]
+        if pairs:
+            rows_idx, cols_idx, values = map(np.array, zip(*pairs))
+            counts[rows_idx, cols_idx] = values
+
+        self.trick_ids = trick_ids
+        self.levels = np.array([t.level for t in catalog.tricks], dtype=np.int64)
+        self.index = index
+        self.counts = counts
+
+    def record(self, pegues_tricks: list[list[int]], delta: int = 1):
+        """Suma (o resta, con delta=-1) los pares de trucos de cada pegue."""
+        for tricks_ids in pegues_tricks:
+            positions = np.array([self.index[t] for t in tricks_ids if t in self.index], dtype=np.int64)
+            if len(positions):
+                self.counts[np.ix_(positions, positions)] += delta
+
+    def recommend(self, landed_ids, limit: int) -> list[tuple[int, float]]:
+        """
+        Trucos no logrados ordenados por afinidad con los logrados, sum_i P(j | i), ponderada hacia
+        un nivel por encima del máximo del usuario.
+        """
+        if not len(self.trick_ids):
+            return []
+        landed = np.zeros(len(self.trick_ids), dtype=bool)
+        landed[[self.index[t] for t in landed_ids if t in self.index]] = True
+
+        counts = self.counts.astype(np.float64)
+        pegues_per_trick = np.diag(counts)
+        affinity = np.zeros(len(self.trick_ids))
+        landed_rows = landed & (pegues_per_trick > 0)
+        if landed_rows.any():
+            affinity = (counts[landed_rows] / pegues_per_trick[landed_rows, None]).sum(axis=0)
+        if pegues_per_trick.max() > 0:
+            affinity += POPULARITY_WEIGHT * pegues_per_trick / pegues_per_trick.max()
+
+        target_level = (self.levels[landed].max() if landed.any() else 0) + 1
+        scores = affinity / (1 + np.abs(self.levels - target_level))
+        scores[landed] = 0
+
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(self.trick_ids[i]), float(scores[i])) for i in order if scores[i] > 0]
+
+
+cooccurrence = CooccurrenceMatrix()
+
+
+async def reload(session_factory):
+    try:
+        async with session_factory() as db:
+            await cooccurrence.rebuild(db)
+    except SQLAlchemyError as e:
+        logger.error("Error al recargar la matriz de co-ocurrencia: %s", e)
+
+
+async def refresh_forever(session_factory, interval: float = RECOMMENDATIONS_REFRESH_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        await reload(session_factory)
+
+
+async def landed_tricks(db, user_id: int) -> list[int]:
+    """Trucos que el usuario ya logró, del resumen user_trick_stats (no de pegue_trick)."""
+    return list((await db.execute(
+        select(UserTrickStats.trick_id).filter(UserTrickStats.user_id == user_id)
+    )).scalars())
+
+
+# --- Actualización después del commit ---
+def track_cooccurrence(db, pegues_tricks: list[list[int]], delta: int = 1):
+    db.info.setdefault("cooccurrence_changes", []).append((pegues_tricks, delta))
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    for pegues_tricks, delta in session.info.pop("cooccurrence_changes", ()):
+        cooccurrence.record(pegues_tricks, delta)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop("cooccurrence_changes", None)
@@ -0,0 +1,137 @@
+"""
+Réplicas de lectura. Con DATABASE_REPLICA_URLS los endpoints que sólo leen piden la sesión a
+get_read_db, que reparte en round-robin entre las réplicas sanas; si no hay ninguna (o no hay
+réplicas configuradas) la sesión es del primario. Las escrituras siempre usan el primario.
+
+Read-your-writes: cada escritura exitosa (POST/PUT/PATCH/DELETE) responde con una cookie que dura
+READ_YOUR_WRITES_SECONDS. Mientras el cliente la mande, sus lecturas van al primario y no ven una
+réplica atrasada. Es una cookie y no estado del worker para que valga aunque la siguiente request
+caiga en otro proceso.
+"""
+import asyncio
+import itertools
+import logging
+import time
+
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import build_engine, get_db, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+READ_YOUR_WRITES_COOKIE = "kbb_last_write"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReplicaSet:
+    """Engines de réplica con su estado de salud; no abre conexiones hasta que se usan."""
+
+    def __init__(self, engines):
+        self.engines = engines
+        # Las lecturas pesadas van a las réplicas: sus queries cuentan en las métricas y el slow query log
+        for engine in engines:
+            instrument_engine(engine)
+        self._sessionmakers = [
+            async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False) for engine in engines
+        ]
+        self._healthy = [True] * len(engines)
+        self._turn = itertools.count()
+
+    def pick(self) -> int | None:
+        """Índice de la próxima réplica sana, o None si no hay ninguna."""
+        healthy = [i for i, ok in enumerate(self._healthy) if ok]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def session(self, index: int):
+        return self._sessionmakers[index]()
+
+    def mark_down(self, index: int):
+        # Hasta el próximo health check, que la vuelve a habilitar si responde
+        self._healthy[index] = False
+
+    async def check(self, timeout: float = settings.replica_health_check_timeout):
+        self._healthy = list(await asyncio.gather(*(self._ping(engine, timeout) for engine in self.engines)))
+
+    @staticmethod
+    async def _ping(engine, timeout: float) -> bool:
+        async def select_one():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        try:
+            await asyncio.wait_for(select_one(), timeout)
+            return True
+        except Exception as e:
+            logger.warning("Réplica %s fuera de servicio: %s", engine.url.render_as_string(), e)
+            return False
+
+    async def check_forever(self, interval: float = settings.replica_health_check_seconds):
+        while True:
+            await asyncio.sleep(interval)
+            await self.check()
+
+    async def dispose(self):
+        for engine in self.engines:
+            await engine.dispose()
+
+
+read_replicas = ReplicaSet([build_engine(settings, url) for url in settings.replica_urls])
+
+
+def wrote_recently(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_db(request: Request, primary: AsyncSession = Depends(get_db)):
+    """
+    Sesión para endpoints de sólo lectura: una réplica sana, o la sesión de la request en el
+    primario (que no toma conexión si no se usa).
+    """
+    index = None if wrote_recently(request) else read_replicas.pick()
+    if index is None:
+        yield primary
+        return
+
+    async with read_replicas.session(index) as db:
+        try:
+            yield db
+        except (DBAPIError, DisconnectionError) as e:
+            # Sólo si se perdió la conexión (la réplica se cayó entre health checks): las próximas
+            # lecturas van a otra. Un error de SQL no dice nada de la salud de la réplica
+            if _connection_lost(e):
+                read_replicas.mark_down(index)
+            raise
+
+
+def _connection_lost(error) -> bool:
+    return isinstance(error, (InterfaceError, DisconnectionError)) or getattr(error, "connection_invalidated", False)
+
+
+class ReadYourWritesMiddleware:
+    """Middleware ASGI: marca con la cookie a los clientes que acaban de escribir."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not read_replicas.engines:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.read_your_writes_seconds
+                cookie = (f"{READ_YOUR_WRITES_COOKIE}={int(time.time()) + window}; Max-Age={window}; "
+                          f"Path=/; HttpOnly; SameSite=Lax")
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
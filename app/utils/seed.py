@@ -1,22 +1,60 @@
+import hashlib
 import json
+from sqlalchemy import select
 from app.database import SessionLocal
 from app.models import trick
+from app.models.seed_state import SeedState
+from app.utils.sql import dialect_insert
+from app.utils.trick_catalog import trick_catalog
 
-def seed_tricks():
-    db = SessionLocal()
-    try:
-        with open('highline_tricks.json', 'r', encoding='utf-8') as file:
-            tricks_by_level = json.load(file)
-            inserted = 0
-            for level, tricks_list in tricks_by_level.items():
-                for name in tricks_list:
-                    if not db.query(trick.Trick).filter_by(name=name).first():
-                        db.add(trick.Trick(name=name, level=int(level)))
-                        inserted += 1
-            db.commit()
-            print(f"{inserted} trucos insertados correctamente.")
-    except Exception as e:
-        print(f"Error al insertar trucos: {e}")
-        db.rollback()
-    finally:
-        db.close()
+CATALOG_PATH = "highline_tricks.json"
+CATALOG_SEED_NAME = "tricks"
+
+async def sync_trick_catalog(db, path: str = CATALOG_PATH) -> int | None:
+    """
+    Inserta los trucos del JSON que todavía no están en la tabla.
+    Devuelve cuántos insertó, o None si el archivo no cambió desde el último seed.
+    """
+    with open(path, 'rb') as file:
+        raw = file.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+
+    state = await db.get(SeedState, CATALOG_SEED_NAME)
+    if state is not None and state.content_hash == content_hash:
+        return None
+
+    existing = set((await db.execute(select(trick.Trick.name))).scalars())
+    missing = {}
+    for level, tricks_list in json.loads(raw).items():
+        for name in tricks_list:
+            if name not in existing:
+                missing.setdefault(name, int(level))
+
+    if missing:
+        # Un solo INSERT por lotes; si otro proceso insertó el mismo nombre, el índice único lo descarta
+        statement = dialect_insert(db.bind.dialect.name, trick.Trick.__table__)
+        if hasattr(statement, "on_conflict_do_nothing"):
+            statement = statement.on_conflict_do_nothing(index_elements=["name"])
+        await db.execute(statement, [{"name": name, "level": level} for name, level in missing.items()])
+
+    if state is None:
+        db.add(SeedState(name=CATALOG_SEED_NAME, content_hash=content_hash))
+    else:
+        state.content_hash = content_hash
+
+    await db.commit()
+    if missing:
+        trick_catalog.invalidate()
+    return len(missing)
+
+async def seed_tricks():
+    async with SessionLocal() as db:
+        try:
+            inserted = await sync_trick_catalog(db)
+            if inserted is None:
+                print("Catálogo de trucos sin cambios, seed omitido.")
+            else:
+                print(f"{inserted} trucos insertados correctamente.")
+        except Exception as e:
+            print(f"Error al insertar trucos: {e}")
+            await db.rollback()
@@ -0,0 +1,97 @@
+import logging
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+MAX_PARAMETER_LENGTH = 200
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    duration_ms: float
+    statement: str
+    parameters: str
+    route: str | None
+    plan: list[str]
+    at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class SlowQueryLog:
+    """Últimas queries lentas en un ring buffer: nunca crece más allá de maxlen."""
+
+    def __init__(self, maxlen: int):
+        self._entries: deque[SlowQuery] = deque(maxlen=maxlen)
+
+    def record(self, conn, statement, parameters, executemany: bool, elapsed: float):
+        if executemany and parameters:
+            parameters = parameters[0]
+        entry = SlowQuery(
+            duration_ms=round(elapsed * 1000, 3),
+            statement=statement,
+            parameters=_describe_parameters(parameters),
+            route=metrics.current_route(),
+            plan=_explain(conn, statement, parameters),
+        )
+        self._entries.append(entry)
+        logger.warning("Query lenta (%.1f ms) en %s: %s %s", entry.duration_ms, entry.route or "-", statement, entry.parameters)
+
+    def entries(self) -> list[SlowQuery]:
+        return list(reversed(self._entries))  # la más reciente primero
+
+    def clear(self):
+        self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_LOG_SIZE)
+
+
+def _describe_parameters(parameters) -> str:
+    """Sólo los tipos de los parámetros: los valores pueden ser hashes de contraseñas o emails."""
+    if isinstance(parameters, dict):
+        text = "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    elif isinstance(parameters, (list, tuple)):
+        names = [type(value).__name__ for value in parameters]
+        text = "(" + ", ".join(names) + ("," if len(names) == 1 else "") + ")"
+    else:
+        text = type(parameters).__name__
+    return text if len(text) <= MAX_PARAMETER_LENGTH else text[:MAX_PARAMETER_LENGTH] + "…"
+
+
+def _explain(conn, statement: str, parameters) -> list[str]:
+    """
+    Plan de la query con un cursor del driver (no pasa por los eventos del engine).
+    EXPLAIN QUERY PLAN / EXPLAIN sin ANALYZE no ejecutan la sentencia.
+
+    Corre en la conexión y la transacción de la request, dentro de un SAVEPOINT: en PostgreSQL un
+    EXPLAIN que falla aborta la transacción, y el diagnóstico nunca debe romper la request.
+    """
+    if not _EXPLAINABLE.match(statement):
+        return []
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        except Exception as e:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            return [f"EXPLAIN falló: {e}"]
+        finally:
+            cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+    except Exception as e:
+        return [f"EXPLAIN falló: {e}"]
+    finally:
+        cursor.close()
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in rows]  # (id, parent, notused, detail)
+    return [row[0] for row in rows]
@@ -0,0 +1,14 @@
+from sqlalchemy import insert as generic_insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(dialect_name: str, table):
+    """
+    INSERT del dialecto en uso, para poder usar ON CONFLICT (SQLite y PostgreSQL).
+    En otros motores devuelve el INSERT genérico.
+    """
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    return generic_insert(table)
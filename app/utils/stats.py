@@ -0,0 +1,174 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from app.models import pegue, trick
+from app.models.stats import UserStats, UserEquipmentStats, UserTrickStats, UserDailyActivity, TrickCooccurrence
+from app.utils import activity
+from app.utils.leaderboards import track_recorded, track_removed
+from app.utils.recommendations import track_cooccurrence
+from app.utils.sql import dialect_insert
+
+
+def _increment(dialect_name: str, table, keys: list[str], rows: list[dict]):
+    """INSERT ... ON CONFLICT DO UPDATE que suma los contadores: atómico aunque haya escrituras concurrentes."""
+    statement = dialect_insert(dialect_name, table)
+    counters = {
+        column: table.c[column] + statement.excluded[column]
+        for column in rows[0] if column not in keys and column != "max_level"
+    }
+    if "max_level" in rows[0]:
+        greatest = func.greatest if dialect_name == "postgresql" else func.max
+        counters["max_level"] = greatest(table.c.max_level, statement.excluded.max_level)
+    return statement.on_conflict_do_update(index_elements=keys, set_=counters)
+
+
+async def record_pegues(db, pegues_data, catalog):
+    """
+    Suma los pegues nuevos a los resúmenes de sus usuarios. Se llama antes del commit,
+    así el resumen y los pegues se guardan (o se descartan) juntos.
+    """
+    totals = defaultdict(lambda: {"total_sessions": 0, "total_duration": 0, "max_level": 0})
+    equipment_counts = Counter()
+    trick_counts = Counter()
+    daily = defaultdict(lambda: {"minutes": 0, "sessions": 0})
+    pegues_tricks = []
+    pair_counts = Counter()
+
+    for pegue_data in pegues_data:
+        user_totals = totals[pegue_data.user_id]
+        user_totals["total_sessions"] += 1
+        user_totals["total_duration"] += pegue_data.duration or 0
+        equipment_counts[(pegue_data.user_id, pegue_data.equipment)] += 1
+        user_day = daily[(pegue_data.user_id, pegue_data.date.date())]
+        user_day["minutes"] += pegue_data.duration or 0
+        user_day["sessions"] += 1
+        tricks_ids = list(dict.fromkeys(pegue_data.tricks_ids))
+        pegues_tricks.append(tricks_ids)
+        pair_counts.update((trick_a, trick_b) for trick_a in tricks_ids for trick_b in tricks_ids)
+        for trick_id in tricks_ids:
+            trick_counts[(pegue_data.user_id, trick_id)] += 1
+            known = catalog.by_id.get(trick_id)
+            if known is not None:
+                user_totals["max_level"] = max(user_totals["max_level"], known.level)
+
+    if not totals:
+        return
+
+    dialect_name = db.bind.dialect.name
+    rows = [{"user_id": user_id, **values} for user_id, values in totals.items()]
+    await db.execute(_increment(dialect_name, UserStats.__table__, ["user_id"], rows), rows)
+
+    rows = [{"user_id": user_id, "equipment": equipment, "sessions": n}
+            for (user_id, equipment), n in equipment_counts.items()]
+    await db.execute(_increment(dialect_name, UserEquipmentStats.__table__, ["user_id", "equipment"], rows), rows)
+
+    rows = [{"user_id": user_id, "day": day, **values} for (user_id, day), values in daily.items()]
+    await db.execute(_increment(dialect_name, UserDailyActivity.__table__, ["user_id", "day"], rows), rows)
+
+    if trick_counts:
+        rows = [{"user_id": user_id, "trick_id": trick_id, "count": n}
+                for (user_id, trick_id), n in trick_counts.items()]
+        await db.execute(_increment(dialect_name, UserTrickStats.__table__, ["user_id", "trick_id"], rows), rows)
+
+        rows = [{"trick_a": trick_a, "trick_b": trick_b, "pegues": n} for (trick_a, trick_b), n in pair_counts.items()]
+        await db.execute(_increment(dialect_name, TrickCooccurrence.__table__, ["trick_a", "trick_b"], rows), rows)
+
+    activity.mark_changed(db, totals)
+    await track_recorded(db, totals, daily)
+    track_cooccurrence(db, pegues_tricks)
+
+
+async def forget_user(db, user_id: int):
+    """
+    Saca al usuario de los resúmenes. Se llama antes de borrar sus pegues: los pares de trucos
+    de esos pegues se descuentan de trick_cooccurrence, que no es por usuario.
+    """
+    for model in (UserStats, UserEquipmentStats, UserTrickStats, UserDailyActivity):
+        await db.execute(delete(model).filter(model.user_id == user_id))
+
+    pegue_trick = pegue.pegue_trick_association
+    tricks_by_pegue = defaultdict(list)
+    for pegue_id, trick_id in await db.execute(
+        select(pegue_trick.c.pegue_id, pegue_trick.c.trick_id)
+        .join(pegue.Pegue, pegue.Pegue.id == pegue_trick.c.pegue_id)
+        .filter(pegue.Pegue.user_id == user_id)
+    ):
+        tricks_by_pegue[pegue_id].append(trick_id)
+    pegues_tricks = list(tricks_by_pegue.values())
+    pair_counts = Counter((trick_a, trick_b) for tricks_ids in pegues_tricks
+                          for trick_a in tricks_ids for trick_b in tricks_ids)
+    if pair_counts:
+        table = TrickCooccurrence.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.trick_a == bindparam("pair_a"), table.c.trick_b == bindparam("pair_b"))
+            .values(pegues=table.c.pegues - bindparam("removed")),
+            [{"pair_a": trick_a, "pair_b": trick_b, "removed": n} for (trick_a, trick_b), n in pair_counts.items()],
+        )
+        # Como rebuild_stats: no quedan pares sin pegues
+        await db.execute(delete(table).filter(table.c.pegues <= 0))
+        track_cooccurrence(db, pegues_tricks, delta=-1)
+
+    activity.mark_changed(db, [user_id])
+    track_removed(db, user_id)
+
+
+async def get_user_stats(db, user_id: int):
+    """Lee el resumen de un usuario: tres lecturas por clave primaria, sin importar cuántos pegues tenga."""
+    totals = await db.get(UserStats, user_id)
+    equipment = (await db.execute(
+        select(UserEquipmentStats.equipment, UserEquipmentStats.sessions)
+        .filter(UserEquipmentStats.user_id == user_id)
+    )).all()
+    tricks = (await db.execute(
+        select(UserTrickStats.trick_id, UserTrickStats.count)
+        .filter(UserTrickStats.user_id == user_id)
+    )).all()
+    return totals, equipment, tricks
+
+
+async def rebuild_stats(db):
+    """Recalcula todos los resúmenes desde pegue / pegue_trick. Para correr fuera de línea."""
+    for model in (UserTrickStats, UserEquipmentStats, UserStats, UserDailyActivity, TrickCooccurrence):
+        await db.execute(delete(model))
+
+    pegue_trick = pegue.pegue_trick_association
+    await db.execute(insert(UserStats).from_select(
+        ["user_id", "total_sessions", "total_duration", "max_level"],
+        select(pegue.Pegue.user_id, func.count(), func.coalesce(func.sum(pegue.Pegue.duration), 0), 0)
+        .group_by(pegue.Pegue.user_id),
+    ))
+    await db.execute(insert(UserEquipmentStats).from_select(
+        ["user_id", "equipment", "sessions"],
+        select(pegue.Pegue.user_id, pegue.Pegue.equipment, func.count())
+        .group_by(pegue.Pegue.user_id, pegue.Pegue.equipment),
+    ))
+    await db.execute(insert(UserTrickStats).from_select(
+        ["user_id", "trick_id", "count"],
+        select(pegue.Pegue.user_id, pegue_trick.c.trick_id, func.count())
+        .join(pegue_trick, pegue_trick.c.pegue_id == pegue.Pegue.id)
+        .group_by(pegue.Pegue.user_id, pegue_trick.c.trick_id),
+    ))
+    other_trick = pegue_trick.alias("other_trick")
+    await db.execute(insert(TrickCooccurrence).from_select(
+        ["trick_a", "trick_b", "pegues"],
+        select(pegue_trick.c.trick_id, other_trick.c.trick_id, func.count())
+        .join(other_trick, other_trick.c.pegue_id == pegue_trick.c.pegue_id)
+        .group_by(pegue_trick.c.trick_id, other_trick.c.trick_id),
+    ))
+    day = func.date(pegue.Pegue.date)
+    await db.execute(insert(UserDailyActivity).from_select(
+        ["user_id", "day", "minutes", "sessions"],
+        select(pegue.Pegue.user_id, day, func.coalesce(func.sum(pegue.Pegue.duration), 0), func.count())
+        .group_by(pegue.Pegue.user_id, day),
+    ))
+    max_level = (
+        select(func.coalesce(func.max(trick.Trick.level), 0))
+        .join(UserTrickStats, UserTrickStats.trick_id == trick.Trick.id)
+        .filter(UserTrickStats.user_id == UserStats.user_id)
+        .scalar_subquery()
+    )
+    await db.execute(update(UserStats).values(max_level=max_level).execution_options(synchronize_session=False))
+    await db.commit()
+    activity.activity_cache.clear()
@@ -0,0 +1,84 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.models import trick
+from app.schemas.trick import TrickOut
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Foto inmutable del catálogo: los trucos, un índice por id y el cuerpo JSON ya serializado."""
+    tricks: tuple[TrickOut, ...]
+    by_id: MappingProxyType
+    body: bytes
+    etag: str
+
+
+class TrickCatalog:
+    """
+    Catálogo de trucos cargado una sola vez por proceso.
+
+    Se vuelve a leer de la base sólo después de que cambie la tabla tricks: los eventos del ORM
+    marcan el catálogo como viejo al hacer commit, y los inserts por Core (seed) llaman a invalidate().
+    """
+
+    def __init__(self):
+        self._snapshot: CatalogSnapshot | None = None
+
+    def invalidate(self):
+        self._snapshot = None
+
+    async def get(self, db) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = await self._load(db)
+        return snapshot
+
+    @staticmethod
+    async def _load(db) -> CatalogSnapshot:
+        result = await db.execute(select(trick.Trick).order_by(trick.Trick.id))
+        tricks = tuple(TrickOut.model_validate(row) for row in result.scalars())
+        body = json.dumps([t.model_dump() for t in tricks], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return CatalogSnapshot(
+            tricks=tricks,
+            by_id=MappingProxyType({t.id: t for t in tricks}),
+            body=body,
+            etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        )
+
+
+trick_catalog = TrickCatalog()
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110), que es la que corresponde para GET."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+# --- Invalidación ---
+def _mark_tricks_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["tricks_changed"] = True
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(trick.Trick, _event_name, _mark_tricks_changed)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("tricks_changed", False):
+        trick_catalog.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop("tricks_changed", None)
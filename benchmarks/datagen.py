@@ -0,0 +1,145 @@
+"""
+Genera un dataset sintético para los benchmarks: N usuarios con M pegues cada uno, con trucos
+tomados del catálogo sembrado.
+
+    python benchmarks/datagen.py --scale 10k
+    python benchmarks/datagen.py --scale 1m --out /tmp/kbb-1m
+
+El resultado es un directorio con keep_bouncing_back.db (migrado, con el catálogo y los
+resúmenes recalculados) listo para `benchmarks/load.py --data <dir>`. Todos los usuarios
+tienen la contraseña BENCH_PASSWORD.
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Escala = cantidad de pegues: (usuarios, pegues por usuario)
+SCALES = {
+    "10k": (100, 100),
+    "1m": (2_000, 500),
+    "10m": (10_000, 1_000),
+}
+EQUIPMENT = ["highline", "highline", "highline", "longline", "midline", "waterline"]
+TRICKS_PER_PEGUE = ([0, 1, 2, 3], [0.3, 0.35, 0.25, 0.1])
+HISTORY_DAYS = 730
+BATCH_SIZE = 50_000
+BENCH_PASSWORD = "bench-password"
+# Mismo formato que usa SQLAlchemy para DateTime en SQLite: las comparaciones del cursor son de texto
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def bootstrap(workdir: Path):
+    shutil.copy(ROOT / "highline_tricks.json", workdir)
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, "-m", "app.bootstrap"], cwd=workdir, env=env, capture_output=True, check=True)
+
+
+def rebuild_stats(workdir: Path):
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, "-m", "app.bootstrap", "rebuild-stats"], cwd=workdir, env=env,
+                   capture_output=True, check=True)
+
+
+def generate(conn: sqlite3.Connection, users: int, pegues_per_user: int, seed: int):
+    from app.utils.hashing import hash_sync
+
+    rng = random.Random(seed)
+    tricks = conn.execute("SELECT id, level FROM tricks ORDER BY level, id").fetchall()
+    max_level = max(level for _, level in tricks)
+    password = hash_sync(BENCH_PASSWORD)  # un solo hash: Argon2 por usuario tardaría horas en 10m
+    now = datetime.now().replace(microsecond=0)
+    created_at = now.strftime(DATETIME_FORMAT)
+
+    first_user = (conn.execute("SELECT coalesce(max(id), 0) FROM users").fetchone()[0]) + 1
+    conn.executemany(
+        "INSERT INTO users (id, name, email, password, created_at) VALUES (?, ?, ?, ?, ?)",
+        ((first_user + i, f"Bench User {i}", f"bench{i}@keepbouncing.dev", password, created_at) for i in range(users)),
+    )
+
+    # Índices de pegue / pegue_trick: se recrean al final, es mucho más rápido que mantenerlos fila a fila
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+        "AND tbl_name IN ('pegue', 'pegue_trick')"
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+
+    pegue_id = (conn.execute("SELECT coalesce(max(id), 0) FROM pegue").fetchone()[0]) + 1
+    pegue_rows, trick_rows = [], []
+    for user_offset in range(users):
+        user_id = first_user + user_offset
+        # Cada usuario tiene un nivel: la mayoría de sus trucos están en su nivel o por debajo
+        skill = rng.randint(1, max_level)
+        reachable = [trick_id for trick_id, level in tricks if level <= skill + 1]
+        for _ in range(pegues_per_user):
+            date = now - timedelta(days=rng.uniform(0, HISTORY_DAYS))
+            pegue_rows.append((pegue_id, user_id, rng.choice(EQUIPMENT),
+                               date.replace(microsecond=0).strftime(DATETIME_FORMAT),
+                               rng.randint(10, 180), "bench"))
+            count = rng.choices(*TRICKS_PER_PEGUE)[0]
+            trick_rows.extend((pegue_id, trick_id, pegue_rows[-1][3])
+                              for trick_id in rng.sample(reachable, min(count, len(reachable))))
+            pegue_id += 1
+
+            if len(pegue_rows) >= BATCH_SIZE:
+                flush(conn, pegue_rows, trick_rows)
+
+    flush(conn, pegue_rows, trick_rows)
+    for _, sql in indexes:
+        conn.execute(sql)
+    conn.commit()
+
+
+def flush(conn, pegue_rows: list, trick_rows: list):
+    conn.executemany("INSERT INTO pegue (id, user_id, equipment, date, duration, notes) VALUES (?, ?, ?, ?, ?, ?)",
+                     pegue_rows)
+    conn.executemany("INSERT INTO pegue_trick (pegue_id, trick_id, date) VALUES (?, ?, ?)", trick_rows)
+    conn.commit()
+    pegue_rows.clear()
+    trick_rows.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un dataset sintético para los benchmarks")
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--users", type=int, help="Reemplaza la cantidad de usuarios de la escala")
+    parser.add_argument("--pegues-per-user", type=int, help="Reemplaza los pegues por usuario de la escala")
+    parser.add_argument("--out", help="Directorio destino (por defecto benchmarks/data/<scale>)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    users, pegues_per_user = SCALES[args.scale]
+    users = args.users or users
+    pegues_per_user = args.pegues_per_user or pegues_per_user
+    workdir = Path(args.out or ROOT / "benchmarks" / "data" / args.scale)
+    if (workdir / "keep_bouncing_back.db").exists():
+        parser.error(f"{workdir} ya tiene un dataset; borralo o usá otro --out")
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    bootstrap(workdir)
+    conn = sqlite3.connect(workdir / "keep_bouncing_back.db")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA synchronous = OFF")
+    try:
+        generate(conn, users, pegues_per_user, args.seed)
+    finally:
+        conn.close()
+    rebuild_stats(workdir)
+
+    print(f"{users} usuarios × {pegues_per_user} pegues = {users * pegues_per_user} pegues en "
+          f"{workdir} ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
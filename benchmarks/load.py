@@ -0,0 +1,272 @@
+"""
+Benchmark de carga de la API sobre un dataset de datagen.py, con un cliente ASGI en el mismo proceso.
+
+    python benchmarks/load.py --data benchmarks/data/10k --output results.json
+    python benchmarks/load.py --data benchmarks/data/10k --baseline baseline.json
+
+Recorre todos los routers y reporta por endpoint p50/p95/p99, throughput y queries SQL por
+request (de las métricas de /metrics). Con --baseline compara contra un resultado guardado y
+termina con código 1 si algún endpoint empeoró más que --tolerance o hace más queries.
+Salvo --in-place, corre sobre una copia del dataset (los POST/PUT lo modifican).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+ADMIN_TOKEN = "bench-admin"
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    route: str  # template de la ruta, para leer las queries de las métricas
+    build: object  # (i, ctx) -> (url, kwargs de httpx)
+    share: float = 1.0  # fracción de --requests (el login paga Argon2)
+
+
+def _user(ctx, i):
+    return ctx["users"][i % len(ctx["users"])]
+
+
+def _auth(ctx, user_id):
+    return {"Authorization": f"Bearer {ctx['tokens'][user_id]}"}
+
+
+def _bulk_body(user_id, i):
+    lines = (json.dumps({"user_id": user_id, "equipment": "highline", "date": f"2024-06-01T10:{n % 60:02d}:00",
+                         "duration": 30, "notes": f"bulk {i}", "tricks_ids": []}) for n in range(100))
+    return "\n".join(lines)
+
+
+SCENARIOS = [
+    Scenario("tricks", "GET", "/tricks/", lambda i, ctx: ("/tricks/", {})),
+    Scenario("tricks_304", "GET", "/tricks/",
+             lambda i, ctx: ("/tricks/", {"headers": {"If-None-Match": ctx["tricks_etag"]}})),
+    Scenario("equipment", "GET", "/equipment/", lambda i, ctx: ("/equipment/", {})),
+    Scenario("users_list", "GET", "/users/", lambda i, ctx: ("/users/", {}), share=0.2),
+    Scenario("user_get", "GET", "/users/{user_id}",
+             lambda i, ctx: (f"/users/{_user(ctx, i)}", {"headers": _auth(ctx, _user(ctx, i))})),
+    Scenario("user_stats", "GET", "/users/{user_id}/stats",
+             lambda i, ctx: (f"/users/{_user(ctx, i)}/stats", {"headers": _auth(ctx, _user(ctx, i))})),
+    Scenario("user_activity_week", "GET", "/users/{user_id}/activity",
+             lambda i, ctx: (f"/users/{_user(ctx, i)}/activity?bucket=week", {"headers": _auth(ctx, _user(ctx, i))})),
+    Scenario("user_recommendations", "GET", "/users/{user_id}/recommendations",
+             lambda i, ctx: (f"/users/{_user(ctx, i)}/recommendations", {"headers": _auth(ctx, _user(ctx, i))})),
+    Scenario("user_export", "GET", "/users/{user_id}/pegues/export",
+             lambda i, ctx: (f"/users/{_user(ctx, i)}/pegues/export", {"headers": _auth(ctx, _user(ctx, i))}), share=0.2),
+    Scenario("pegues_page", "GET", "/pegues/", lambda i, ctx: ("/pegues/?limit=50", {})),
+    Scenario("pegues_next_page", "GET", "/pegues/",
+             lambda i, ctx: (f"/pegues/?limit=50&cursor={ctx['cursor']}", {})),
+    Scenario("pegues_by_user", "GET", "/pegues/",
+             lambda i, ctx: (f"/pegues/?limit=50&user_id={_user(ctx, i)}&include=tricks", {})),
+    Scenario("pegues_by_trick", "GET", "/pegues/",
+             lambda i, ctx: (f"/pegues/?limit=50&trick_id={ctx['tricks'][i % len(ctx['tricks'])]}", {})),
+    Scenario("pegue_create", "POST", "/pegues/", lambda i, ctx: ("/pegues/", {"json": {
+        "user_id": _user(ctx, i), "equipment": "highline", "date": "2024-06-01T10:00:00", "duration": 45,
+        "notes": f"bench {i}", "tricks_ids": ctx["tricks"][i % len(ctx["tricks"]):][:2]}})),
+    Scenario("pegues_bulk_100", "POST", "/pegues/bulk", lambda i, ctx: ("/pegues/bulk", {
+        "content": _bulk_body(_user(ctx, i), i), "headers": {"Content-Type": "application/x-ndjson"}}), share=0.2),
+    Scenario("user_update", "PUT", "/users/update/{user_id}",
+             lambda i, ctx: (f"/users/update/{_user(ctx, i)}", {"json": {"name": f"Bench User {i}"},
+                                                                "headers": _auth(ctx, _user(ctx, i))})),
+    Scenario("login", "POST", "/users/login", lambda i, ctx: ("/users/login", {"json": {
+        "email": ctx["emails"][_user(ctx, i)], "password": ctx["password"]}}), share=0.1),
+    Scenario("leaderboard_duration", "GET", "/leaderboards/{metric}", lambda i, ctx: ("/leaderboards/duration", {})),
+    Scenario("leaderboard_recent", "GET", "/leaderboards/{metric}", lambda i, ctx: ("/leaderboards/recent", {})),
+    Scenario("metrics", "GET", "/metrics", lambda i, ctx: ("/metrics", {}), share=0.2),
+    Scenario("admin_slow_queries", "GET", "/admin/slow-queries",
+             lambda i, ctx: ("/admin/slow-queries", {"headers": {"X-Admin-Token": ADMIN_TOKEN}})),
+]
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[int(q) - 1]
+
+
+def sql_sample(method: str, route: str) -> tuple[float, float]:
+    from prometheus_client import REGISTRY
+    labels = {"method": method, "route": route}
+    return (REGISTRY.get_sample_value("db_queries_per_request_sum", labels) or 0,
+            REGISTRY.get_sample_value("db_queries_per_request_count", labels) or 0)
+
+
+async def build_context(client, users_sample: int) -> dict:
+    from app import auth
+    from app.database import SessionLocal
+    from app.models import trick, user
+    from benchmarks.datagen import BENCH_PASSWORD
+    from sqlalchemy import select
+
+    async with SessionLocal() as db:
+        rows = (await db.execute(
+            select(user.User.id, user.User.email).filter(user.User.email.like("bench%")).order_by(user.User.id).limit(users_sample)
+        )).all()
+        tricks = list((await db.execute(select(trick.Trick.id).order_by(trick.Trick.id))).scalars())
+    if not rows:
+        raise SystemExit("El dataset no tiene usuarios de benchmark: generalo con benchmarks/datagen.py")
+
+    first_page = (await client.get("/pegues/?limit=50")).json()
+    return {
+        "users": [row.id for row in rows],
+        "emails": {row.id: row.email for row in rows},
+        "tokens": {row.id: auth.create_access_token(str(row.id)) for row in rows},
+        "password": BENCH_PASSWORD,
+        "tricks": tricks,
+        "tricks_etag": (await client.get("/tricks/")).headers["etag"],
+        "cursor": first_page["next_cursor"],
+    }
+
+
+async def run_scenario(client, scenario: Scenario, ctx: dict, requests: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        url, kwargs = scenario.build(i, ctx)
+        await client.request(scenario.method, url, **kwargs)
+
+    queries_before, count_before = sql_sample(scenario.method, scenario.route)
+    latencies, errors = [], 0
+    pending = iter(range(warmup, warmup + requests))
+
+    async def worker():
+        nonlocal errors
+        for i in pending:
+            url, kwargs = scenario.build(i, ctx)
+            start = time.perf_counter()
+            response = await client.request(scenario.method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    queries_after, count_after = sql_sample(scenario.method, scenario.route)
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": len(latencies) / elapsed,
+        "sql_per_request": (queries_after - queries_before) / max(count_after - count_before, 1),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=None) as client:
+            ctx = await build_context(client, args.users)
+            for scenario in SCENARIOS:
+                if args.only and scenario.name not in args.only:
+                    continue
+                requests = max(int(args.requests * scenario.share), 5)
+                results[scenario.name] = await run_scenario(client, scenario, ctx, requests, args.concurrency, args.warmup)
+                print_row(scenario.name, results[scenario.name])
+    return results
+
+
+def print_row(name: str, numbers: dict):
+    print(f"{name:<22} p50 {numbers['p50_ms']:8.2f} ms  p95 {numbers['p95_ms']:8.2f} ms  "
+          f"p99 {numbers['p99_ms']:8.2f} ms  {numbers['throughput_rps']:8.1f} req/s  "
+          f"{numbers['sql_per_request']:5.1f} SQL/req  {numbers['errors']} errores")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Endpoints cuyo p95 creció más que tolerance, o que ahora hacen más queries por request."""
+    regressions = []
+    print(f"\n{'endpoint':<22} {'p95 base':>10} {'p95 actual':>11} {'cambio':>8}   SQL/req")
+    for name, current in results["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        change = current["p95_ms"] / previous["p95_ms"] - 1 if previous["p95_ms"] else 0.0
+        more_sql = current["sql_per_request"] > previous["sql_per_request"] + 0.01
+        flag = ""
+        if change > tolerance or more_sql:
+            regressions.append(name)
+            flag = "  <-- regresión"
+        print(f"{name:<22} {previous['p95_ms']:8.2f} ms {current['p95_ms']:8.2f} ms {change:+8.1%}   "
+              f"{previous['sql_per_request']:.1f} -> {current['sql_per_request']:.1f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga de la API sobre un dataset sintético")
+    parser.add_argument("--data", required=True, help="Directorio generado por benchmarks/datagen.py")
+    parser.add_argument("--requests", type=int, default=200, help="Requests por endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--users", type=int, default=50, help="Usuarios distintos que usan los escenarios")
+    parser.add_argument("--only", nargs="*", help="Sólo estos escenarios")
+    parser.add_argument("--in-place", action="store_true", help="Usa el dataset sin copiarlo")
+    parser.add_argument("--output", help="Guarda los resultados en este archivo JSON")
+    parser.add_argument("--baseline", help="Resultado anterior (JSON) contra el cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento de p95 tolerado (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    data = Path(args.data).resolve()
+    output = Path(args.output).resolve() if args.output else None
+    baseline = Path(args.baseline).resolve() if args.baseline else None
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = data if args.in_place else Path(tmp)
+        if not args.in_place:
+            shutil.copy(data / "keep_bouncing_back.db", workdir)
+            shutil.copy(ROOT / "highline_tricks.json", workdir)
+
+        # La app usa la base relativa al directorio actual; la configuración se lee al importarla
+        os.chdir(workdir)
+        os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+        os.environ["ADMIN_TOKEN"] = ADMIN_TOKEN
+        # Con escrituras concurrentes sobre SQLite el slow query log avisa seguido: queda en /admin/slow-queries
+        logging.getLogger("app.utils.slow_queries").setLevel(logging.ERROR)
+        with sqlite3.connect(workdir / "keep_bouncing_back.db") as conn:
+            pegues = conn.execute("SELECT count(*) FROM pegue").fetchone()[0]
+
+        endpoints = asyncio.run(run(args))
+
+    results = {
+        "meta": {
+            "dataset": str(data),
+            "pegues": pegues,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+        },
+        "endpoints": endpoints,
+    }
+    if output:
+        output.write_text(json.dumps(results, indent=2))
+
+    if baseline:
+        regressions = compare(results, json.loads(baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"\nRegresiones: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
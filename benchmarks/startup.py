@@ -0,0 +1,80 @@
+"""
+Benchmark de arranque de un worker: cuánto tarda en importar app.main y correr el lifespan.
+
+    python benchmarks/startup.py --runs 5
+
+Compara el arranque normal (los workers no tocan la base) contra BOOTSTRAP_ON_STARTUP=1,
+que repite en cada worker las migraciones y el seed como pasaba antes al importar app.main.
+Cada corrida es un proceso nuevo sobre una base SQLite temporal ya inicializada.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import asyncio, json, time
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+
+async def start():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+t2 = asyncio.run(start())
+print(json.dumps({"import_s": t1 - t0, "startup_s": t2 - t1}))
+"""
+
+MODES = {
+    "lifespan": {},
+    "bootstrap_on_startup": {"BOOTSTRAP_ON_STARTUP": "1"},
+}
+
+
+def run_child(workdir: Path, extra_env: dict) -> dict:
+    env = {**os.environ, "PYTHONPATH": str(ROOT), **extra_env}
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de un worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Guarda los resultados en este archivo JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        shutil.copy(ROOT / "highline_tricks.json", workdir)
+        env = {**os.environ, "PYTHONPATH": str(ROOT)}
+        subprocess.run([sys.executable, "-m", "app.bootstrap"], cwd=workdir, env=env,
+                       capture_output=True, check=True)
+
+        results = {}
+        for mode, extra_env in MODES.items():
+            samples = [run_child(workdir, extra_env) for _ in range(args.runs)]
+            results[mode] = {
+                key: statistics.median(sample[key] for sample in samples)
+                for key in ("import_s", "startup_s")
+            }
+            results[mode]["total_s"] = results[mode]["import_s"] + results[mode]["startup_s"]
+
+    for mode, numbers in results.items():
+        print(f"{mode:<22} import {numbers['import_s'] * 1000:8.1f} ms   "
+              f"lifespan {numbers['startup_s'] * 1000:8.1f} ms   total {numbers['total_s'] * 1000:8.1f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
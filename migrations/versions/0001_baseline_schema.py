@@ -0,0 +1,114 @@
+"""baseline schema
+
+Esquema completo al momento de introducir Alembic. Las bases creadas antes con
+Base.metadata.create_all ya tienen (parte de) estas tablas, así que cada tabla e
+índice se crea sólo si falta; en esas bases además se agregan los índices nuevos.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 12:47:22.983243
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_table_if_missing(name, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def _create_index_if_missing(name, table, columns, unique=False):
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+    if name not in existing:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _create_table_if_missing('equipment',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index_if_missing('ix_equipment_id', 'equipment', ['id'])
+
+    _create_table_if_missing('seed_state',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('applied_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    _create_table_if_missing('tricks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('level', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index_if_missing('ix_tricks_id', 'tricks', ['id'])
+    _create_index_if_missing('ix_tricks_name', 'tricks', ['name'], unique=True)
+
+    _create_table_if_missing('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+    )
+    _create_index_if_missing('ix_users_id', 'users', ['id'])
+
+    _create_table_if_missing('pegue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('equipment', sa.String(length=50), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index_if_missing('ix_pegue_id', 'pegue', ['id'])
+    _create_index_if_missing('ix_pegue_date_id', 'pegue', ['date', 'id'])
+    _create_index_if_missing('ix_pegue_user_id_date_id', 'pegue', ['user_id', 'date', 'id'])
+    _create_index_if_missing('ix_pegue_equipment_date_id', 'pegue', ['equipment', 'date', 'id'])
+
+    _create_table_if_missing('user_equipment',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('equipment_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['equipment_id'], ['equipment.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'equipment_id')
+    )
+
+    _create_table_if_missing('pegue_trick',
+        sa.Column('pegue_id', sa.Integer(), nullable=False),
+        sa.Column('trick_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['pegue_id'], ['pegue.id'], ),
+        sa.ForeignKeyConstraint(['trick_id'], ['tricks.id'], ),
+        sa.PrimaryKeyConstraint('pegue_id', 'trick_id')
+    )
+    _create_index_if_missing('ix_pegue_trick_trick_id_pegue_id', 'pegue_trick', ['trick_id', 'pegue_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('pegue_trick')
+    op.drop_table('user_equipment')
+    op.drop_table('pegue')
+    op.drop_table('users')
+    op.drop_table('tricks')
+    op.drop_table('seed_state')
+    op.drop_table('equipment')
@@ -0,0 +1,42 @@
+"""normalize user emails
+
+Emails guardados en minúsculas y sin espacios, para que el login busque por igualdad
+y use el índice único de users.email. Si dos cuentas quedarían con el mismo email
+la migración se frena y las lista: hay que resolverlas a mano antes de reintentar.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:05:41.302518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    collisions = conn.execute(sa.text(
+        "SELECT lower(trim(email)) AS normalized, count(*) FROM users "
+        "GROUP BY lower(trim(email)) HAVING count(*) > 1 ORDER BY normalized"
+    )).all()
+    if collisions:
+        listed = "\n".join(f"  {normalized} ({count} cuentas)" for normalized, count in collisions)
+        raise RuntimeError(f"Emails que sólo difieren en mayúsculas o espacios; unificá esas cuentas y reintentá:\n{listed}")
+
+    op.execute("UPDATE users SET email = lower(trim(email)) WHERE email <> lower(trim(email))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # No hay forma de recuperar las mayúsculas originales, y los emails normalizados siguen siendo válidos
+    pass
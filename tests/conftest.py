@@ -1,34 +1,177 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import httpx
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.database import Base
-from app.models import user, pegue, equipment, trick
+from app import auth
+from app.utils import activity
+from app.database import Base, get_db, instrument_engine
+from app.models import user, pegue, equipment, trick, seed_state, stats
 
 
 @pytest.fixture(scope="session")
-def test_engine():
-    engine = create_engine(
-        "sqlite:///:memory:",
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+async def test_engine():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    Base.metadata.create_all(bind=engine)
-    return engine
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def session_factory(test_engine):
+    return async_sessionmaker(bind=test_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(scope="function")
-def db_session(test_engine):
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+async def db_session(session_factory):
+    async with session_factory() as db:
+        try:
+            await db.execute(delete(user.User))
+            await db.commit()
 
-    db = SessionLocal()
-    try:
-        db.query(user.User).delete()
-        db.commit()
+            yield db
+        finally:
+            await db.rollback()
+
+
+class QueryCounter:
+    """Statements executed on the test engine while the block runs."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def report(self) -> str:
+        return "\n".join(f"  {i}. {' '.join(sql.split())}" for i, sql in enumerate(self.statements, 1))
+
+
+@pytest.fixture
+def count_queries(test_engine):
+    """`with count_queries() as queries:` collects every statement sent to the database inside the block."""
+
+    @contextmanager
+    def counting():
+        counter = QueryCounter()
+
+        def listener(conn, cursor, statement, *args):
+            counter.statements.append(statement)
 
-        yield db
+        event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            yield counter
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    return counting
+
+
+@pytest.fixture
+def query_budget(count_queries):
+    """
+    `with query_budget(2): await api.get("/pegues/")` fails the test if the block runs more than
+    2 statements, listing them so the N+1 or the duplicate lookup is easy to spot.
+    """
+
+    @contextmanager
+    def budget(max_queries: int):
+        with count_queries() as counter:
+            yield counter
+        if len(counter) > max_queries:
+            pytest.fail(f"{len(counter)} queries, budget is {max_queries}:\n{counter.report()}", pytrace=False)
+
+    return budget
+
+
+@pytest.fixture
+async def api(session_factory):
+    """The real app (middlewares and routers) over ASGI, with get_db bound to the test engine."""
+    from app.main import app
+
+    async def get_test_db():
+        # Same cleanup as app.database.get_db: roll back when the handler raises
+        async with session_factory() as db:
+            try:
+                yield db
+            except Exception:
+                await db.rollback()
+                raise
+
+    app.dependency_overrides[get_db] = get_test_db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            yield client
     finally:
-        db.rollback()
-        db.close()
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    # SQLite reuses ids across tests, so a stale cache entry could point at another user
+    auth.principal_cache.clear()
+    auth.token_cache.clear()
+    yield
+    auth.principal_cache.clear()
+    auth.token_cache.clear()
+
+
+@pytest.fixture
+async def logbook(db_session):
+    """Two users with a handful of pegues each, some of them on the same date."""
+    activity.activity_cache.clear()
+    for table in (stats.UserTrickStats, stats.UserEquipmentStats, stats.UserStats, stats.UserDailyActivity,
+                  stats.TrickCooccurrence):
+        await db_session.execute(delete(table))
+    await db_session.execute(delete(pegue.pegue_trick_association))
+    await db_session.execute(delete(pegue.Pegue))
+    await db_session.execute(delete(trick.Trick))
+
+    owner = user.User(name="Owner", email="owner@example.com", password="h")
+    other = user.User(name="Other", email="other@example.com", password="h")
+    spiral = trick.Trick(name="Spiral", level=4)
+    panic = trick.Trick(name="Panic", level=1)
+    db_session.add_all([owner, other, spiral, panic])
+    await db_session.commit()
+
+    base = datetime(2024, 1, 1, 10, 0)
+    pegues = []
+    for i in range(6):
+        pegues.append(pegue.Pegue(
+            user_id=owner.id if i % 2 == 0 else other.id,
+            equipment="highline" if i < 3 else "longline",
+            date=base + timedelta(days=i // 2),  # two pegues per day
+            duration=30 + i,
+            notes=f"pegue {i}",
+            tricks=[spiral] if i % 3 == 0 else [panic],
+        ))
+    db_session.add_all(pegues)
+    await db_session.commit()
+
+    yield {"owner": owner, "other": other, "spiral": spiral, "panic": panic, "pegues": pegues}
 
+    for table in (stats.UserTrickStats, stats.UserEquipmentStats, stats.UserStats, stats.UserDailyActivity,
+                  stats.TrickCooccurrence):
+        await db_session.execute(delete(table))
+    await db_session.execute(delete(pegue.pegue_trick_association))
+    await db_session.execute(delete(pegue.Pegue))
+    await db_session.execute(delete(trick.Trick))
+    await db_session.commit()
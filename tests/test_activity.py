@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.pegues import create_pegue
+from app.routers.users import get_user_activity
+from app.schemas.pegue import PegueCreate
+from app.utils import stats
+
+
+async def test_activity_by_day(db_session, logbook):
+    owner = logbook["owner"]
+    await stats.rebuild_stats(db_session)
+
+    result = await get_user_activity(owner.id, None, None, "day", db_session, owner)
+
+    assert result["bucket"] == "day"
+    assert result["items"] == [
+        {"start": date(2024, 1, 1), "minutes": 30, "sessions": 1},
+        {"start": date(2024, 1, 2), "minutes": 32, "sessions": 1},
+        {"start": date(2024, 1, 3), "minutes": 34, "sessions": 1},
+    ]
+
+
+async def test_activity_by_week_and_month(db_session, logbook):
+    owner = logbook["owner"]
+    await stats.rebuild_stats(db_session)
+    await create_pegue(PegueCreate(
+        user_id=owner.id, equipment="midline", date=datetime(2024, 2, 7, 9, 0),
+        duration=60, notes="", tricks_ids=[],
+    ), db_session)
+
+    weeks = await get_user_activity(owner.id, None, None, "week", db_session, owner)
+    months = await get_user_activity(owner.id, None, None, "month", db_session, owner)
+
+    assert weeks["items"] == [
+        {"start": date(2024, 1, 1), "minutes": 96, "sessions": 3},
+        {"start": date(2024, 2, 5), "minutes": 60, "sessions": 1},
+    ]
+    assert months["items"] == [
+        {"start": date(2024, 1, 1), "minutes": 96, "sessions": 3},
+        {"start": date(2024, 2, 1), "minutes": 60, "sessions": 1},
+    ]
+
+
+async def test_activity_range_is_inclusive(db_session, logbook):
+    owner = logbook["owner"]
+    await stats.rebuild_stats(db_session)
+
+    result = await get_user_activity(owner.id, date(2024, 1, 2), date(2024, 1, 3), "week", db_session, owner)
+
+    assert result["items"] == [{"start": date(2024, 1, 1), "minutes": 66, "sessions": 2}]
+
+
+async def test_new_pegue_invalidates_cached_activity(db_session, logbook):
+    other = logbook["other"]
+    await stats.rebuild_stats(db_session)
+    before = await get_user_activity(other.id, None, None, "day", db_session, other)
+
+    await create_pegue(PegueCreate(
+        user_id=other.id, equipment="highline", date=datetime(2024, 1, 2, 18, 0),
+        duration=10, notes="", tricks_ids=[],
+    ), db_session)
+    after = await get_user_activity(other.id, None, None, "day", db_session, other)
+
+    assert before["items"][0] == {"start": date(2024, 1, 1), "minutes": 31, "sessions": 1}
+    assert after["items"][1] == {"start": date(2024, 1, 2), "minutes": 33 + 10, "sessions": 2}
+
+
+async def test_activity_rejects_inverted_range(db_session, logbook):
+    owner = logbook["owner"]
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_user_activity(owner.id, date(2024, 2, 1), date(2024, 1, 1), "day", db_session, owner)
+
+    assert exc_info.value.status_code == 400
+
+
+async def test_activity_only_for_owner(db_session, logbook):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_user_activity(logbook["owner"].id, None, None, "day", db_session, logbook["other"])
+
+    assert exc_info.value.status_code == 403
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import signal
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from app import auth
+from app.models import user as user_model
+from app.routers.users import update_user, delete_user
+from app.schemas.user import UserUpdate
+from app.utils.cache import TTLCache
+from app.utils.hashing import HashPool, hash_sync
+
+
+@pytest.fixture
+def secret_key(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+
+
+def bearer(user_id):
+    token = auth.create_access_token(subject=str(user_id))
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def test_hash_and_verify_run_in_pool():
+    hashed = await auth.hash_password("password123")
+
+    assert hashed != "password123"
+    assert await auth.verify_password("password123", hashed)
+    assert not await auth.verify_password("wrongpassword", hashed)
+    assert auth.hash_pool.pending == 0
+
+
+async def test_hash_pool_recovers_from_a_dead_worker():
+    pool = HashPool(workers=1, queue_size=0)
+    try:
+        await pool.run(hash_sync, "password123")
+        broken = pool._executor
+        for process in list(broken._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)  # what the OOM killer does
+        for _ in range(100):
+            if broken._broken:
+                break
+            await asyncio.sleep(0.05)
+
+        hashed = await pool.run(hash_sync, "password123")
+
+        assert hashed.startswith("$argon2")
+        assert pool._executor is not broken
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+async def test_saturated_hash_pool_returns_503(monkeypatch):
+    monkeypatch.setattr(auth.hash_pool, "pending", auth.hash_pool.capacity)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.hash_password("password123")
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == str(auth.HASH_RETRY_AFTER_SECONDS)
+
+
+async def test_current_user_is_cached(db_session, secret_key):
+    db_user = user_model.User(name="Cached", email="cached@example.com", password="h")
+    db_session.add(db_user)
+    await db_session.commit()
+    credentials = bearer(db_user.id)
+
+    first = await auth.get_current_user(credentials, db_session)
+
+    hits = auth.principal_cache.hits
+    db = AsyncMock()
+    second = await auth.get_current_user(credentials, db)
+
+    assert first == second == auth.Principal(id=db_user.id, name="Cached", email="cached@example.com")
+    db.scalar.assert_not_called()
+    assert auth.principal_cache.hits == hits + 1
+
+
+async def test_update_and_delete_invalidate_cached_principal(db_session, secret_key):
+    db_user = user_model.User(name="Before", email="before@example.com", password="h")
+    db_session.add(db_user)
+    await db_session.commit()
+    credentials = bearer(db_user.id)
+
+    current = await auth.get_current_user(credentials, db_session)
+    await update_user(db_user.id, UserUpdate(name="After"), db=db_session, current_user=current)
+
+    current = await auth.get_current_user(credentials, db_session)
+    assert current.name == "After"
+
+    await delete_user(db_user.id, db_session, current)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.get_current_user(credentials, db_session)
+    assert exc_info.value.status_code == 401
+
+
+def test_decode_token_verifies_signature_once(secret_key):
+    token = auth.create_access_token(subject="42")
+
+    with patch("app.auth.jwt.decode", wraps=auth.jwt.decode) as mock_decode:
+        first = auth.decode_token(token)
+        second = auth.decode_token(token)
+
+    assert first["sub"] == second["sub"] == "42"
+    mock_decode.assert_called_once()
+
+
+def test_decode_token_does_not_cache_invalid_tokens(secret_key):
+    token = auth.create_access_token(subject="42", expires_delta=timedelta(seconds=-1))
+
+    assert auth.decode_token(token) is None
+    assert auth.decode_token(token + "x") is None
+    assert len(auth.token_cache) == 0
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    now = [1000.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+
+    cache.set("a", 1)
+    cache.set("b", 2, expires_at=1005.0)
+    assert cache.get("a") == 1  # "a" becomes the most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None  # evicted as least recently used
+
+    now[0] = 1011.0
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 3}
@@ -0,0 +1,24 @@
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("argv", [[], ["rebuild-stats"]])
+def test_cli_exits_after_running(tmp_path, argv):
+    shutil.copy(ROOT / "highline_tricks.json", tmp_path)
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"}
+    if argv:
+        subprocess.run([sys.executable, "-m", "app.bootstrap"], cwd=tmp_path, env=env, check=True, timeout=60)
+
+    # A pooled aiosqlite connection left open keeps the process alive: timeout instead of exit
+    result = subprocess.run([sys.executable, "-m", "app.bootstrap", *argv], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "app.db").exists()
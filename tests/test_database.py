@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app import auth
+from app.config import Settings
+from app.database import build_engine
+
+
+async def pragma(engine, name):
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+
+
+async def test_sqlite_file_gets_pool_and_pragmas(tmp_path):
+    engine = build_engine(Settings(
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'app.db'}",
+        db_pool_size=3, sqlite_busy_timeout_ms=1234, sqlite_cache_size_kib=2048,
+    ))
+    try:
+        assert isinstance(engine.pool, AsyncAdaptedQueuePool)
+        assert engine.pool.size() == 3
+        assert await pragma(engine, "journal_mode") == "wal"
+        assert await pragma(engine, "synchronous") == 1  # NORMAL
+        assert await pragma(engine, "busy_timeout") == 1234
+        assert await pragma(engine, "cache_size") == -2048
+    finally:
+        await engine.dispose()
+
+
+async def test_sqlite_memory_keeps_the_default_pool():
+    engine = build_engine(Settings(database_url="sqlite+aiosqlite:///:memory:", db_pool_size=3))
+    try:
+        assert isinstance(engine.pool, StaticPool)
+        assert await pragma(engine, "busy_timeout") == 5000
+    finally:
+        await engine.dispose()
+
+
+async def test_concurrent_writer_waits_for_the_lock(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+    # Two engines stand in for two uvicorn workers sharing the file
+    first, second = build_engine(Settings(database_url=url)), build_engine(Settings(database_url=url))
+    try:
+        async with first.begin() as conn:
+            await conn.execute(text("CREATE TABLE counter (n INTEGER)"))
+
+        async def write_later():
+            async with second.begin() as conn:
+                await conn.execute(text("INSERT INTO counter VALUES (2)"))
+
+        async with first.begin() as conn:
+            await conn.execute(text("INSERT INTO counter VALUES (1)"))
+            waiting = asyncio.create_task(write_later())
+            await asyncio.sleep(0.2)  # the second writer is blocked on the lock, not failing
+            assert not waiting.done()
+        await waiting
+
+        async with first.connect() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM counter"))).scalar() == 2
+    finally:
+        await first.dispose()
+        await second.dispose()
+
+
+@pytest.fixture
+def count_checkouts(test_engine):
+    checkouts = []
+    listener = lambda *args: checkouts.append(1)
+    event.listen(test_engine.sync_engine.pool, "checkout", listener)
+    yield checkouts
+    event.remove(test_engine.sync_engine.pool, "checkout", listener)
+
+
+def record_init(init, sessions):
+    def wrapper(self, *args, **kwargs):
+        sessions.append(self)
+        init(self, *args, **kwargs)
+    return wrapper
+
+
+async def test_auth_and_handler_share_one_session(api, logbook, count_checkouts, monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    owner = logbook["owner"]
+    headers = {"Authorization": f"Bearer {auth.create_access_token(subject=str(owner.id))}"}
+    sessions = []
+    monkeypatch.setattr(AsyncSession, "__init__", record_init(AsyncSession.__init__, sessions))
+
+    # Principal lookup in get_current_user plus the handler's own queries
+    response = await api.get(f"/users/{owner.id}/stats", headers=headers)
+
+    assert response.status_code == 200
+    assert len(sessions) == 1
+    assert len(count_checkouts) == 1
+
+
+async def test_cached_endpoints_never_check_out_a_connection(api, logbook, count_checkouts, monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    owner = logbook["owner"]
+    auth.principal_cache.set(owner.id, auth.Principal(id=owner.id, name=owner.name, email=owner.email))
+    headers = {"Authorization": f"Bearer {auth.create_access_token(subject=str(owner.id))}"}
+    await api.get("/tricks/")  # warm the catalog
+    count_checkouts.clear()
+
+    assert (await api.get("/tricks/")).status_code == 200
+    assert (await api.get(f"/users/{owner.id}", headers=headers)).status_code == 200
+    assert count_checkouts == []
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers import users as users_router
+from app.routers.users import export_pegues
+from app.utils import export
+
+
+@pytest.fixture
+def export_sessions(session_factory, monkeypatch):
+    monkeypatch.setattr(users_router, "SessionLocal", session_factory)
+
+
+async def read_body(response):
+    return "".join([chunk async for chunk in response.body_iterator])
+
+
+async def test_export_ndjson(db_session, logbook, export_sessions, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    owner = logbook["owner"]
+
+    response = await export_pegues(owner.id, "ndjson", owner)
+    records = [json.loads(line) for line in (await read_body(response)).splitlines()]
+
+    assert response.media_type == "application/x-ndjson"
+    assert [r["notes"] for r in records] == ["pegue 0", "pegue 2", "pegue 4"]
+    assert [r["tricks"] for r in records] == [["Spiral"], ["Panic"], ["Panic"]]
+
+
+async def test_export_csv(db_session, logbook, export_sessions):
+    owner = logbook["owner"]
+
+    response = await export_pegues(owner.id, "csv", owner)
+    rows = list(csv.DictReader(io.StringIO(await read_body(response))))
+
+    assert response.headers["content-disposition"] == f'attachment; filename="pegues-{owner.id}.csv"'
+    assert [row["tricks"] for row in rows] == ["Spiral", "Panic", "Panic"]
+    assert rows[0]["date"] == "2024-01-01T10:00:00"
+
+
+async def test_export_only_for_owner(db_session, logbook, export_sessions):
+    with pytest.raises(HTTPException) as exc_info:
+        await export_pegues(logbook["owner"].id, "ndjson", logbook["other"])
+
+    assert exc_info.value.status_code == 403
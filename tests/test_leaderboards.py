@@ -0,0 +1,96 @@
+from datetime import date, datetime
+
+from app.routers.leaderboards import get_leaderboard
+from app.routers.pegues import create_pegue
+from app.routers.users import delete_user
+from app.schemas.pegue import PegueCreate
+from app.utils import stats
+from app.utils.leaderboards import Leaderboard, Leaderboards, leaderboards
+
+
+def test_leaderboard_keeps_top_k_sorted():
+    board = Leaderboard(size=2)
+    board.load({1: 10, 2: 30})
+
+    board.set(3, 20)
+    assert board.top(5) == [(2, 30), (3, 20)]
+
+    board.set(1, 40)
+    assert board.top(5) == [(1, 40), (2, 30)]
+
+
+def test_leaderboard_refills_when_a_top_entry_drops():
+    board = Leaderboard(size=2)
+    board.load({1: 10, 2: 30, 3: 20})
+
+    board.remove(2)
+    assert board.top(5) == [(3, 20), (1, 10)]
+
+    board.set(3, 5)
+    assert board.top(5) == [(1, 10), (3, 5)]
+
+
+def test_leaderboard_breaks_ties_by_user_id():
+    board = Leaderboard(size=3)
+    board.load({5: 10, 2: 10, 9: 0})
+
+    assert board.top(3) == [(2, 10), (5, 10)]
+
+
+def test_recent_sessions_expire_with_the_window():
+    today = [date(2024, 3, 30)]
+    boards = Leaderboards(size=10, recent_days=30, today=lambda: today[0])
+    level = {"total_sessions": 1, "total_duration": 30, "max_level": 0}
+
+    boards.record({1: level, 2: level}, {(1, date(2024, 3, 1)): {"minutes": 30, "sessions": 2},
+                                         (2, date(2024, 3, 20)): {"minutes": 30, "sessions": 1}},
+                  {1: "Uno", 2: "Dos"})
+    assert [entry["user_id"] for entry in boards.top("recent", 10)] == [1, 2]
+
+    today[0] = date(2024, 4, 1)
+    assert boards.top("recent", 10) == [{"rank": 1, "user_id": 2, "name": "Dos", "score": 1}]
+
+
+async def test_leaderboards_follow_committed_pegues(db_session, logbook):
+    owner, other = logbook["owner"], logbook["other"]
+    await stats.rebuild_stats(db_session)
+    await leaderboards.rebuild(db_session)
+
+    by_duration = await get_leaderboard("duration", 10)
+    assert [(e["name"], e["score"]) for e in by_duration["entries"]] == [("Other", 99), ("Owner", 96)]
+
+    await create_pegue(PegueCreate(
+        user_id=owner.id, equipment="highline", date=datetime(2024, 2, 1, 9, 0),
+        duration=10, notes="", tricks_ids=[logbook["spiral"].id],
+    ), db_session)
+
+    by_duration = await get_leaderboard("duration", 10)
+    by_level = await get_leaderboard("level", 1)
+    assert [(e["name"], e["score"]) for e in by_duration["entries"]] == [("Owner", 106), ("Other", 99)]
+    assert by_level["entries"] == [{"rank": 1, "user_id": owner.id, "name": "Owner", "score": 4}]
+
+
+async def test_rolled_back_pegues_do_not_reach_leaderboards(db_session, logbook):
+    owner_id = logbook["owner"].id
+    await stats.rebuild_stats(db_session)
+    await leaderboards.rebuild(db_session)
+
+    pegue_data = PegueCreate(user_id=owner_id, equipment="highline", date=datetime(2024, 2, 1, 9, 0),
+                             duration=500, notes="", tricks_ids=[])
+    await stats.record_pegues(db_session, [pegue_data], None)
+    await db_session.rollback()
+
+    assert leaderboards.boards["duration"].scores[owner_id] == 96
+
+
+async def test_deleted_user_leaves_leaderboards(db_session, logbook):
+    owner, other = logbook["owner"], logbook["other"]
+    await stats.rebuild_stats(db_session)
+    await leaderboards.rebuild(db_session)
+    assert owner.id in leaderboards.boards["duration"].scores
+
+    await delete_user(owner.id, db_session, owner)
+
+    assert all(owner.id not in board.scores for board in leaderboards.boards.values())
+    assert all(entry["user_id"] != owner.id for entry in leaderboards.top("duration", 10))
+    assert other.id in leaderboards.boards["duration"].scores
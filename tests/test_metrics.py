@@ -0,0 +1,71 @@
+from unittest.mock import AsyncMock, patch
+
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app import auth
+from app.routers import metrics as metrics_router
+from app.utils.metrics import MetricsMiddleware
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def make_app(session_factory):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router.router, prefix="/metrics")
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        async with session_factory() as db:
+            await db.execute(text("SELECT 1"))
+            await db.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    return app
+
+
+async def test_requests_are_labelled_by_route_template(session_factory):
+    app = make_app(session_factory)
+    labels = {"method": "GET", "route": "/items/{item_id}"}
+    requests_before = sample("http_requests_total", **labels, status="200")
+    queries_before = sample("db_queries_per_request_sum", **labels)
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/missing")
+
+    assert sample("http_requests_total", **labels, status="200") - requests_before == 2
+    assert sample("db_queries_per_request_sum", **labels) - queries_before == 4
+    assert sample("http_requests_total", method="GET", route="<unmatched>", status="404") >= 1
+
+
+async def test_queries_outside_requests_are_not_attributed(session_factory):
+    before = sample("db_queries_per_request_count", method="GET", route="/items/{item_id}")
+
+    async with session_factory() as db:
+        await db.execute(text("SELECT 1"))
+
+    assert sample("db_queries_per_request_count", method="GET", route="/items/{item_id}") == before
+
+
+async def test_password_hashing_time_is_tracked():
+    before = sample("password_hashing_seconds_count", operation="hash")
+
+    with patch.object(auth.hash_pool, "run", new_callable=AsyncMock, return_value="hashed"):
+        await auth.hash_password("secret123")
+
+    assert sample("password_hashing_seconds_count", operation="hash") - before == 1
+
+
+async def test_metrics_endpoint_exposes_prometheus_text(session_factory):
+    async with httpx.AsyncClient(app=make_app(session_factory), base_url="http://test") as client:
+        response = await client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds_bucket" in response.text
@@ -0,0 +1,187 @@
+import json
+
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from starlette.requests import Request
+
+from app import database
+from app.models import pegue as pegue_model
+from app.routers import pegues as pegues_router
+from app.routers.pegues import list_pegues, create_pegues_bulk
+from app.utils.slow_queries import slow_query_log
+
+
+async def test_list_pegues_newest_first(db_session, logbook):
+    page = await list_pegues(limit=10, db=db_session)
+
+    keys = [(p.date, p.id) for p in page["items"]]
+    assert keys == sorted(keys, reverse=True)
+    assert len(keys) == 6
+    assert page["next_cursor"] is None
+
+
+async def test_list_pegues_cursor_walks_every_row_once(db_session, logbook):
+    seen = []
+    cursor = None
+    while True:
+        page = await list_pegues(limit=4, cursor=cursor, db=db_session)
+        seen.extend(p.id for p in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(p.id for p in logbook["pegues"])
+    assert len(seen) == len(set(seen))
+
+
+async def test_list_pegues_filters(db_session, logbook):
+    owner = logbook["owner"]
+
+    by_user = (await list_pegues(limit=10, user_id=owner.id, db=db_session))["items"]
+    assert by_user and all(p.user_id == owner.id for p in by_user)
+
+    by_equipment = (await list_pegues(limit=10, equipment="longline", db=db_session))["items"]
+    assert len(by_equipment) == 3 and all(p.equipment == "longline" for p in by_equipment)
+
+    by_date = (await list_pegues(limit=10, date_from=datetime(2024, 1, 2),
+                                 date_to=datetime(2024, 1, 3), db=db_session))["items"]
+    assert [p.date.day for p in by_date] == [2, 2]
+
+    by_trick = (await list_pegues(limit=10, trick_id=logbook["spiral"].id, db=db_session))["items"]
+    assert len(by_trick) == 2
+    assert all(logbook["spiral"] in p.tricks for p in by_trick)
+
+
+async def test_list_pegues_by_trick_walks_the_index_in_order(db_session, logbook, monkeypatch):
+    monkeypatch.setattr(database, "SLOW_QUERY_THRESHOLD_MS", 1e-6)  # log every statement with its plan
+    slow_query_log.clear()
+
+    await list_pegues(limit=1, trick_id=logbook["panic"].id, include="", db=db_session)
+
+    plan = slow_query_log.entries()[0].plan
+    slow_query_log.clear()
+    assert any("ix_pegue_trick_trick_id_date_pegue_id" in line for line in plan)
+    assert not any("TEMP B-TREE" in line for line in plan), plan
+
+
+async def test_list_pegues_by_trick_cursor_walks_every_row_once(db_session, logbook):
+    panic = logbook["panic"]
+    seen, cursor = [], None
+    while True:
+        page = await list_pegues(limit=1, trick_id=panic.id, cursor=cursor, db=db_session)
+        seen.extend((p.date, p.id) for p in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = sorted(((p.date, p.id) for p in logbook["pegues"] if panic in p.tricks), reverse=True)
+    assert seen == expected
+
+
+async def test_list_pegues_invalid_cursor(db_session, logbook):
+    with pytest.raises(HTTPException) as exc_info:
+        await list_pegues(limit=10, cursor="not-a-cursor", db=db_session)
+
+    assert exc_info.value.status_code == 400
+
+
+async def test_list_pegues_loads_tricks_in_one_batch(db_session, logbook, count_queries):
+    db_session.expire_all()
+    with count_queries() as queries:
+        page = await list_pegues(limit=10, db=db_session)
+        serialized = [t.name for p in page["items"] for t in p.tricks]
+
+    assert len(serialized) == 6
+    assert len(queries) == 2
+
+
+async def test_list_pegues_without_tricks(db_session, logbook):
+    page = await list_pegues(limit=10, include="", db=db_session)
+
+    assert len(page["items"]) == 6
+    assert all(p.tricks is None for p in page["items"])
+
+    with pytest.raises(HTTPException) as exc_info:
+        await list_pegues(limit=10, include="tricks,comments", db=db_session)
+    assert exc_info.value.status_code == 400
+
+
+def make_stream_request(chunks, content_type):
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "path": "/pegues/bulk",
+             "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
+
+
+def bulk_row(user_id, trick_ids, day=1):
+    return {"user_id": user_id, "equipment": "highline", "date": f"2024-02-{day:02d}T10:00:00",
+            "duration": 20, "tricks_ids": trick_ids, "notes": "sync"}
+
+
+async def count_rows(db_session, table):
+    return await db_session.scalar(select(func.count()).select_from(table))
+
+
+async def test_bulk_ndjson_reports_row_errors_without_aborting(db_session, logbook, monkeypatch):
+    monkeypatch.setattr(pegues_router, "BULK_CHUNK_SIZE", 2)
+    owner, spiral = logbook["owner"], logbook["spiral"]
+    lines = [
+        json.dumps(bulk_row(owner.id, [spiral.id], day=1)),
+        json.dumps(bulk_row(owner.id, [9999], day=2)),
+        "{not json",
+        json.dumps(bulk_row(123456, [spiral.id], day=3)),
+        json.dumps({"user_id": owner.id}),
+        json.dumps(bulk_row(owner.id, [spiral.id, logbook["panic"].id], day=4)),
+        json.dumps(bulk_row(owner.id, [], day=5)),
+    ]
+    body = ("\n".join(lines) + "\n").encode()
+    before = await count_rows(db_session, pegue_model.Pegue)
+
+    # Chunks that cut lines in half, as they would arrive from the network
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    result = await create_pegues_bulk(make_stream_request(chunks, "application/x-ndjson"), db_session)
+
+    assert result["inserted"] == 3
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3, 4]
+    assert await count_rows(db_session, pegue_model.Pegue) == before + 3
+    links = (await db_session.execute(
+        select(pegue_model.pegue_trick_association.c.trick_id)
+        .join(pegue_model.Pegue, pegue_model.Pegue.id == pegue_model.pegue_trick_association.c.pegue_id)
+        .filter(pegue_model.Pegue.notes == "sync")
+    )).scalars().all()
+    assert sorted(links) == sorted([spiral.id, spiral.id, logbook["panic"].id])
+
+
+async def test_bulk_json_array(db_session, logbook):
+    owner, panic = logbook["owner"], logbook["panic"]
+    body = json.dumps([bulk_row(owner.id, [panic.id], day=d) for d in range(1, 4)]).encode()
+
+    result = await create_pegues_bulk(make_stream_request([body[:10], body[10:]], "application/json"), db_session)
+
+    assert result == {"inserted": 3, "errors": []}
+
+
+async def test_bulk_json_array_skips_a_malformed_element(db_session, logbook):
+    owner, panic = logbook["owner"], logbook["panic"]
+    valid = [json.dumps(bulk_row(owner.id, [panic.id], day=d)) for d in (1, 3)]
+    body = f'[{valid[0]}, {{"equipment": "highline", "notes": "a, [b]",}}, {valid[1]}]'.encode()
+
+    result = await create_pegues_bulk(make_stream_request([body[i:i + 7] for i in range(0, len(body), 7)],
+                                                          "application/json"), db_session)
+
+    assert result["inserted"] == 2
+    assert [error["index"] for error in result["errors"]] == [1]
+
+
+async def test_bulk_rejects_unknown_content_type(db_session, logbook):
+    with pytest.raises(HTTPException) as exc_info:
+        await create_pegues_bulk(make_stream_request([b"x"], "text/plain"), db_session)
+
+    assert exc_info.value.status_code == 415
@@ -0,0 +1,85 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from app import auth
+from app.routers.admin import download_profile, list_profiles
+from app.utils import profiling
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "s3cret")
+    return tmp_path
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/work/{n}")
+    async def work(n: int):
+        return {"total": sum(i * i for i in range(n))}
+
+    return app
+
+
+async def get(app, path, headers=None):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        return await client.get(path, headers=headers)
+
+
+async def test_profile_header_saves_a_report(profile_dir):
+    response = await get(make_app(), "/work/1000", {"X-Profile": "s3cret"})
+
+    report_id = response.headers["x-profile-id"]
+    text = (profile_dir / f"{report_id}.txt").read_text()
+    meta = json.loads(text.splitlines()[0])
+    assert meta["route"] == "GET /work/{n}"
+    assert meta["status"] == 200
+    assert "cumulative" in text
+    assert (profile_dir / f"{report_id}.prof").is_file()
+
+
+async def test_requests_are_not_profiled_without_a_valid_header(profile_dir):
+    for headers in (None, {"X-Profile": "wrong"}):
+        response = await get(make_app(), "/work/10", headers)
+        assert "x-profile-id" not in response.headers
+
+    assert list(profile_dir.iterdir()) == []
+
+
+async def test_sampling_profiles_without_header(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+
+    response = await get(make_app(), "/work/10")
+
+    assert "x-profile-id" in response.headers
+
+
+async def test_report_directory_is_bounded(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MAX_REPORTS", 2)
+    app = make_app()
+
+    ids = [(await get(app, "/work/10", {"X-Profile": "s3cret"})).headers["x-profile-id"] for _ in range(3)]
+
+    assert [report["id"] for report in await list_profiles()] == [ids[2], ids[1]]
+    assert len(list(profile_dir.glob("*.prof"))) == 2
+
+
+async def test_download_profile(profile_dir):
+    report_id = (await get(make_app(), "/work/10", {"X-Profile": "s3cret"})).headers["x-profile-id"]
+
+    response = await download_profile(report_id, "prof")
+    assert response.path == profile_dir / f"{report_id}.prof"
+
+    for bad_id in ("../../etc/passwd", "20240101T000000000000-deadbeef"):
+        with pytest.raises(HTTPException) as exc_info:
+            await download_profile(bad_id, "text")
+        assert exc_info.value.status_code == 404
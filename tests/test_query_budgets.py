@@ -0,0 +1,102 @@
+"""
+SQL budgets per endpoint, measured through the real app: a lazy load or a repeated lookup
+makes the count grow with the data and fails here instead of slipping in silently.
+"""
+import json
+
+import pytest
+
+from app import auth
+from app.utils.trick_catalog import trick_catalog
+
+
+def auth_headers(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {auth.create_access_token(subject=str(user_id))}"}
+
+
+@pytest.fixture(autouse=True)
+def secret_key(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+
+
+@pytest.fixture
+async def warm_catalog(db_session, logbook):
+    # The catalog is cached per process; budgets below are for the steady state
+    trick_catalog.invalidate()
+    await trick_catalog.get(db_session)
+    yield
+    trick_catalog.invalidate()
+
+
+@pytest.mark.parametrize("limit", [1, 3, 50])
+async def test_pegues_page_is_two_queries_for_any_page_size(api, logbook, query_budget, limit):
+    with query_budget(2):
+        response = await api.get("/pegues/", params={"limit": limit})
+
+    assert response.status_code == 200
+    assert all(item["tricks"] for item in response.json()["items"])
+
+
+async def test_pegues_page_without_tricks_is_one_query(api, logbook, query_budget):
+    with query_budget(1):
+        response = await api.get("/pegues/", params={"limit": 50, "include": ""})
+
+    assert len(response.json()["items"]) == 6
+
+
+async def test_get_user_reuses_the_authenticated_principal(api, logbook, query_budget):
+    owner = logbook["owner"]
+
+    with query_budget(1):
+        response = await api.get(f"/users/{owner.id}", headers=auth_headers(owner.id))
+    assert response.json()["email"] == owner.email
+
+    # Second request: the principal comes from the cache
+    with query_budget(0):
+        await api.get(f"/users/{owner.id}", headers=auth_headers(owner.id))
+
+
+async def test_user_stats_reads_only_the_summaries(api, logbook, warm_catalog, query_budget):
+    owner = logbook["owner"]
+    auth.principal_cache.set(owner.id, auth.Principal(id=owner.id, name=owner.name, email=owner.email))
+
+    with query_budget(3):
+        response = await api.get(f"/users/{owner.id}/stats", headers=auth_headers(owner.id))
+
+    assert response.status_code == 200
+
+
+async def test_tricks_catalog_is_served_from_memory(api, warm_catalog, query_budget):
+    with query_budget(0):
+        response = await api.get("/tricks/")
+
+    assert response.status_code == 200
+
+
+async def test_budget_failure_lists_the_statements(api, logbook, query_budget):
+    with pytest.raises(pytest.fail.Exception) as exc_info:
+        with query_budget(1):
+            await api.get("/pegues/", params={"limit": 10})
+
+    message = str(exc_info.value)
+    assert message.startswith("2 queries, budget is 1:")
+    assert "FROM pegue" in message and "pegue_trick" in message
+
+
+def bulk_body(user_id: int, trick_ids: list[int], rows: int) -> str:
+    return "\n".join(json.dumps({"user_id": user_id, "equipment": "highline", "date": f"2024-03-{n % 28 + 1:02d}T10:00:00",
+                                 "duration": 30, "notes": f"bulk {n}", "tricks_ids": trick_ids}) for n in range(rows))
+
+
+@pytest.mark.parametrize("rows", [5, 50])
+async def test_bulk_insert_cost_does_not_grow_with_rows(api, logbook, warm_catalog, query_budget, rows):
+    owner, spiral = logbook["owner"], logbook["spiral"]
+
+    # User check, pegue and pegue_trick inserts, five summary upserts, leaderboard name lookup
+    with query_budget(9) as queries:
+        response = await api.post("/pegues/bulk", content=bulk_body(owner.id, [spiral.id], rows),
+                                  headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.json() == {"inserted": rows, "errors": []}
+    inserts = [sql for sql in queries.statements if sql.startswith("INSERT INTO pegue ")]
+    assert len(inserts) == 1  # one multi-row INSERT ... RETURNING, not one per row
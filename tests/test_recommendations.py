@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.models import trick
+from app.routers.pegues import create_pegue
+from app.routers.users import get_recommendations
+from app.schemas.pegue import PegueCreate
+from app.utils import stats
+from app.utils.recommendations import cooccurrence
+
+
+@pytest.fixture
+async def combos(db_session, logbook):
+    """The logbook plus two tricks that the other user lands together with Panic."""
+    sit_start = trick.Trick(name="Sit start", level=2)
+    double_drop = trick.Trick(name="Double drop", level=5)
+    db_session.add_all([sit_start, double_drop])
+    await db_session.commit()
+    await stats.rebuild_stats(db_session)
+    await cooccurrence.rebuild(db_session)
+
+    other, panic = logbook["other"], logbook["panic"]
+    for tricks_ids in ([panic.id, sit_start.id], [panic.id, sit_start.id], [panic.id, double_drop.id]):
+        await create_pegue(PegueCreate(
+            user_id=other.id, equipment="highline", date=datetime(2024, 2, 1, 9, 0),
+            duration=20, notes="", tricks_ids=tricks_ids,
+        ), db_session)
+
+    return {**logbook, "sit_start": sit_start, "double_drop": double_drop}
+
+
+async def test_recommendations_prefer_one_level_above_max(db_session, combos):
+    owner = combos["owner"]
+
+    result = await get_recommendations(owner.id, 5, db_session, owner)
+
+    # Owner landed Spiral (4) and Panic: Double drop co-occurs less with Panic than Sit start, but it is level 5
+    assert [r["name"] for r in result] == ["Double drop", "Sit start"]
+    assert result[0]["score"] == pytest.approx(1 / 7, rel=1e-2)
+    assert result[1]["score"] == pytest.approx((2 / 7) / 4, rel=1e-2)
+
+
+async def test_incremental_matrix_matches_rebuild(db_session, combos):
+    incremental = cooccurrence.counts.copy()
+
+    await stats.rebuild_stats(db_session)
+    await cooccurrence.rebuild(db_session)
+
+    assert np.array_equal(incremental, cooccurrence.counts)
+    panic, sit_start = (cooccurrence.index[combos[name].id] for name in ("panic", "sit_start"))
+    assert cooccurrence.counts[panic, sit_start] == 2
+    assert cooccurrence.counts[panic, panic] == 7
+
+
+async def test_recommendations_exclude_landed_tricks(db_session, combos):
+    other = combos["other"]
+
+    result = await get_recommendations(other.id, 5, db_session, other)
+
+    assert {r["name"] for r in result}.isdisjoint({"Panic", "Spiral", "Sit start", "Double drop"})
+
+
+async def test_recommendations_only_for_owner(db_session, logbook):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_recommendations(logbook["owner"].id, 5, db_session, logbook["other"])
+
+    assert exc_info.value.status_code == 403
@@ -0,0 +1,103 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import delete, text
+from sqlalchemy.exc import OperationalError
+from starlette.requests import Request
+
+from app.config import Settings
+from app.database import Base, build_engine
+from app.models import equipment
+from app.utils import replicas
+from app.utils.replicas import ReplicaSet, get_read_db
+
+
+@pytest.fixture
+async def replica_files(tmp_path):
+    """Two SQLite files standing in for replicas, each with one row to tell them apart."""
+    engines = [build_engine(Settings(), f"sqlite+aiosqlite:///{tmp_path / f'replica{i}.db'}") for i in range(2)]
+    for i, engine in enumerate(engines):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(equipment.Equipment.__table__.insert(), {"name": f"replica {i}"})
+    yield engines
+    for engine in engines:
+        await engine.dispose()
+
+
+async def test_round_robin_skips_unhealthy_replicas(replica_files, tmp_path):
+    broken = build_engine(Settings(), f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replica_set = ReplicaSet([replica_files[0], broken, replica_files[1]])
+
+    await replica_set.check()
+
+    assert [replica_set.pick() for _ in range(4)] == [0, 2, 0, 2]
+
+    replica_set.mark_down(0)
+    replica_set.mark_down(2)
+    assert replica_set.pick() is None
+
+    await replica_set.check()  # they answer again
+    assert {replica_set.pick() for _ in range(2)} == {0, 2}
+
+
+async def test_reads_go_to_replicas_until_the_client_writes(api, db_session, replica_files, monkeypatch):
+    await db_session.execute(delete(equipment.Equipment))
+    await db_session.commit()
+    monkeypatch.setattr(replicas, "read_replicas", ReplicaSet(replica_files))
+
+    names = set()
+    for _ in range(2):
+        names |= {item["name"] for item in (await api.get("/equipment/")).json()}
+    assert names == {"replica 0", "replica 1"}
+
+    response = await api.post("/equipment/", json={"name": "Slackline"})
+    assert replicas.READ_YOUR_WRITES_COOKIE in response.cookies
+
+    # Within the window the writer reads its own write from the primary
+    assert [item["name"] for item in (await api.get("/equipment/")).json()] == ["Slackline"]
+
+    api.cookies.clear()
+    assert (await api.get("/equipment/")).json()[0]["name"].startswith("replica")
+
+    await db_session.execute(delete(equipment.Equipment))
+    await db_session.commit()
+
+
+async def test_replica_queries_count_in_request_metrics(api, replica_files, monkeypatch, count_queries):
+    monkeypatch.setattr(replicas, "read_replicas", ReplicaSet(replica_files[:1]))
+    labels = {"method": "GET", "route": "/equipment/"}
+    before = REGISTRY.get_sample_value("db_queries_per_request_sum", labels) or 0
+
+    with count_queries() as primary_queries:
+        response = await api.get("/equipment/")
+
+    assert [item["name"] for item in response.json()] == ["replica 0"]
+    assert len(primary_queries) == 0
+    assert REGISTRY.get_sample_value("db_queries_per_request_sum", labels) - before == 1
+
+
+async def test_sql_error_leaves_the_replica_up(replica_files, monkeypatch):
+    replica_set = ReplicaSet(replica_files[:1])
+    monkeypatch.setattr(replicas, "read_replicas", replica_set)
+
+    sessions = get_read_db(Request({"type": "http", "headers": []}), primary=None)
+    db = await sessions.__anext__()
+    with pytest.raises(OperationalError) as exc_info:
+        await db.execute(text("SELECT * FROM no_such_table"))
+    with pytest.raises(OperationalError):
+        await sessions.athrow(exc_info.value)  # what FastAPI does when the endpoint raises
+
+    assert replica_set.pick() == 0
+
+
+async def test_lost_connection_marks_the_replica_down(replica_files, monkeypatch):
+    replica_set = ReplicaSet(replica_files[:1])
+    monkeypatch.setattr(replicas, "read_replicas", replica_set)
+
+    sessions = get_read_db(Request({"type": "http", "headers": []}), primary=None)
+    await sessions.__anext__()
+    lost = OperationalError("SELECT 1", (), Exception("server closed the connection"), connection_invalidated=True)
+    with pytest.raises(OperationalError):
+        await sessions.athrow(lost)
+
+    assert replica_set.pick() is None
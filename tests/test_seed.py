@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.models import trick as trick_model
+from app.models.seed_state import SeedState
+from app.utils.seed import sync_trick_catalog
+
+
+@pytest.fixture
+async def empty_catalog(db_session):
+    await db_session.execute(delete(trick_model.Trick))
+    await db_session.execute(delete(SeedState))
+    await db_session.commit()
+    yield
+    await db_session.execute(delete(trick_model.Trick))
+    await db_session.execute(delete(SeedState))
+    await db_session.commit()
+
+
+def write_catalog(path, tricks_by_level):
+    path.write_text(json.dumps(tricks_by_level), encoding="utf-8")
+    return str(path)
+
+
+async def trick_names(db_session):
+    return sorted((await db_session.execute(select(trick_model.Trick.name))).scalars())
+
+
+async def test_seed_inserts_only_missing_tricks(db_session, empty_catalog, tmp_path):
+    db_session.add(trick_model.Trick(name="Panic", level=1))
+    await db_session.commit()
+    path = write_catalog(tmp_path / "tricks.json", {"1": ["Panic", "Sofa Roll"], "4": ["Spiral"]})
+
+    inserted = await sync_trick_catalog(db_session, path)
+
+    assert inserted == 2
+    assert await trick_names(db_session) == ["Panic", "Sofa Roll", "Spiral"]
+
+
+async def test_seed_skips_unchanged_catalog(db_session, empty_catalog, tmp_path, count_queries):
+    path = write_catalog(tmp_path / "tricks.json", {"1": ["Panic"], "4": ["Spiral"]})
+    assert await sync_trick_catalog(db_session, path) == 2
+
+    with count_queries() as queries:
+        assert await sync_trick_catalog(db_session, path) is None
+
+    assert len(queries) == 1
+    assert "FROM seed_state" in queries.statements[0]
+
+
+async def test_seed_picks_up_catalog_changes(db_session, empty_catalog, tmp_path):
+    path = write_catalog(tmp_path / "tricks.json", {"1": ["Panic"]})
+    await sync_trick_catalog(db_session, path)
+
+    write_catalog(tmp_path / "tricks.json", {"1": ["Panic"], "5": ["Obi Wan"]})
+
+    assert await sync_trick_catalog(db_session, path) == 1
+    assert await trick_names(db_session) == ["Obi Wan", "Panic"]
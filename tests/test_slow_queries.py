@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app import auth, database
+from app.models import pegue
+from app.routers.admin import list_slow_queries
+from app.utils.slow_queries import _explain, slow_query_log
+
+
+@pytest.fixture(autouse=True)
+def empty_log():
+    slow_query_log.clear()
+    yield
+    slow_query_log.clear()
+
+
+async def test_slow_statements_are_logged_with_plan(db_session, logbook, monkeypatch):
+    monkeypatch.setattr(database, "SLOW_QUERY_THRESHOLD_MS", 1e-6)
+
+    await db_session.execute(select(pegue.Pegue).filter(pegue.Pegue.user_id == logbook["owner"].id))
+
+    entry = slow_query_log.entries()[0]
+    assert entry.statement.startswith("SELECT pegue.id")
+    assert entry.parameters == "(int,)"  # types only, never the values
+    assert entry.route is None
+    assert any("ix_pegue_user_id_date_id" in line for line in entry.plan)
+
+
+async def test_failed_explain_leaves_the_transaction_usable(db_session, logbook):
+    db_session.add(pegue.Pegue(user_id=logbook["owner"].id, equipment="highline", date=datetime(2024, 2, 1),
+                               duration=1, notes="uncommitted"))
+    await db_session.flush()
+
+    conn = await db_session.connection()
+    plan = await conn.run_sync(lambda sync_conn: _explain(sync_conn, "SELECT * FROM missing_table", ()))
+
+    assert plan[0].startswith("EXPLAIN falló")
+    notes = (await db_session.execute(select(pegue.Pegue.notes))).scalars().all()
+    assert "uncommitted" in notes
+    await db_session.rollback()
+
+
+async def test_fast_statements_are_not_logged(db_session, monkeypatch):
+    monkeypatch.setattr(database, "SLOW_QUERY_THRESHOLD_MS", 60_000)
+
+    await db_session.execute(select(pegue.Pegue))
+
+    assert slow_query_log.entries() == []
+
+
+async def test_admin_endpoint_returns_latest_first(db_session, monkeypatch):
+    monkeypatch.setattr(database, "SLOW_QUERY_THRESHOLD_MS", 1e-6)
+    await db_session.execute(select(pegue.Pegue.id))
+    await db_session.execute(select(pegue.Pegue.user_id))
+
+    entries = await list_slow_queries(limit=1)
+
+    assert len(entries) == 1
+    assert entries[0].statement.startswith("SELECT pegue.user_id")
+
+
+def test_admin_token_is_required(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "s3cret")
+
+    auth.require_admin("s3cret")
+    for token in (None, "wrong"):
+        with pytest.raises(HTTPException) as exc_info:
+            auth.require_admin(token)
+        assert exc_info.value.status_code == 403
+
+
+def test_admin_endpoints_closed_without_token(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", None)
+
+    with pytest.raises(HTTPException):
+        auth.require_admin("anything")
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.models import pegue as pegue_models, stats as stats_models, user as user_models
+from app.routers.pegues import create_pegue
+from app.routers.users import get_user_stats, delete_user
+from app.schemas.pegue import PegueCreate
+from app.utils import stats
+from app.utils.recommendations import cooccurrence
+from app.utils.trick_catalog import trick_catalog
+
+
+async def test_rebuild_stats_summarizes_logbook(db_session, logbook):
+    owner = logbook["owner"]
+    trick_catalog.invalidate()
+    await stats.rebuild_stats(db_session)
+
+    result = await get_user_stats(owner.id, db_session, owner)
+
+    assert result["total_sessions"] == 3
+    assert result["total_duration"] == 30 + 32 + 34
+    assert result["sessions_by_equipment"] == {"highline": 2, "longline": 1}
+    assert [(t["name"], t["count"]) for t in result["trick_frequency"]] == [("Panic", 2), ("Spiral", 1)]
+    assert result["highest_level"] == 4
+
+
+async def test_create_pegue_updates_stats_incrementally(db_session, logbook):
+    owner, other = logbook["owner"], logbook["other"]
+    trick_catalog.invalidate()
+    await stats.rebuild_stats(db_session)
+
+    await create_pegue(PegueCreate(
+        user_id=other.id, equipment="midline", date=datetime(2024, 2, 1, 9, 0),
+        duration=45, notes="nuevo", tricks_ids=[logbook["spiral"].id],
+    ), db_session)
+    incremental = await get_user_stats(other.id, db_session, other)
+
+    await stats.rebuild_stats(db_session)
+    rebuilt = await get_user_stats(other.id, db_session, other)
+
+    assert incremental == rebuilt
+    assert incremental["total_sessions"] == 4
+    assert incremental["sessions_by_equipment"]["midline"] == 1
+    assert incremental["highest_level"] == 4
+
+
+async def test_stats_without_pegues(db_session, logbook):
+    owner = logbook["owner"]
+
+    result = await get_user_stats(owner.id, db_session, owner)
+
+    assert result["total_sessions"] == 0
+    assert result["trick_frequency"] == []
+    assert result["highest_level"] is None
+
+
+async def test_stats_only_for_owner(db_session, logbook):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_user_stats(logbook["owner"].id, db_session, logbook["other"])
+
+    assert exc_info.value.status_code == 403
+
+
+async def test_delete_user_forgets_stats(db_session, logbook):
+    climber = user_models.User(name="Climber", email="climber@example.com", password="h")
+    db_session.add(climber)
+    await db_session.commit()
+    trick_catalog.invalidate()
+    await stats.rebuild_stats(db_session)
+    await cooccurrence.rebuild(db_session)
+    for tricks_ids in ([logbook["panic"].id], [logbook["panic"].id, logbook["spiral"].id]):
+        await create_pegue(PegueCreate(user_id=climber.id, equipment="highline", date=datetime(2024, 2, 1, 9, 0),
+                                       duration=20, notes="", tricks_ids=tricks_ids), db_session)
+
+    result = await delete_user(climber.id, db_session, climber)
+
+    assert result == {"detail": "User deleted"}
+    assert await db_session.get(stats_models.UserStats, climber.id) is None
+    assert await db_session.scalar(select(func.count()).select_from(pegue_models.Pegue)
+                                   .filter(pegue_models.Pegue.user_id == climber.id)) == 0
+    # The co-occurrence table and matrix lose the climber's pairs: they match a rebuild from the remaining pegues
+    cooccurrence_rows = select(stats_models.TrickCooccurrence.trick_a, stats_models.TrickCooccurrence.trick_b,
+                               stats_models.TrickCooccurrence.pegues)
+    incremental_rows, incremental_counts = set(await db_session.execute(cooccurrence_rows)), cooccurrence.counts.copy()
+    await stats.rebuild_stats(db_session)
+    await cooccurrence.rebuild(db_session)
+    assert incremental_rows == set(await db_session.execute(cooccurrence_rows))
+    assert np.array_equal(incremental_counts, cooccurrence.counts)
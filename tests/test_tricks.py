@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from sqlalchemy import delete
+from starlette.requests import Request
+
+from app.models import trick as trick_model
+from app.routers.tricks import list_tricks
+from app.utils.trick_catalog import trick_catalog, etag_matches
+
+
+def make_request(headers=None):
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/tricks/", "headers": raw_headers})
+
+
+@pytest.fixture
+async def catalog(db_session):
+    await db_session.execute(delete(trick_model.Trick))
+    db_session.add_all([trick_model.Trick(name="Panic", level=1), trick_model.Trick(name="Spiral", level=4)])
+    await db_session.commit()
+    trick_catalog.invalidate()
+    yield
+    await db_session.execute(delete(trick_model.Trick))
+    await db_session.commit()
+    trick_catalog.invalidate()
+
+
+async def test_list_tricks_serves_precomputed_body(db_session, catalog):
+    response = await list_tricks(make_request(), db_session)
+
+    assert response.status_code == 200
+    assert [t["name"] for t in json.loads(response.body)] == ["Panic", "Spiral"]
+    assert response.headers["etag"].startswith('"')
+
+    again = await list_tricks(make_request(), db_session)
+    assert again.body is response.body
+
+
+async def test_list_tricks_not_modified(db_session, catalog):
+    etag = (await list_tricks(make_request(), db_session)).headers["etag"]
+
+    response = await list_tricks(make_request({"If-None-Match": f'W/{etag}, "other"'}), db_session)
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+
+
+async def test_catalog_refreshes_when_tricks_change(db_session, catalog):
+    etag = (await list_tricks(make_request(), db_session)).headers["etag"]
+
+    db_session.add(trick_model.Trick(name="Sushi", level=4))
+    await db_session.commit()
+
+    response = await list_tricks(make_request({"If-None-Match": etag}), db_session)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "Sushi" in [t["name"] for t in json.loads(response.body)]
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
@@ -4,9 +4,9 @@ from unittest.mock import MagicMock
 from app.schemas.user import UserUpdate
 from app.routers.users import update_user
 from app.models import user as user_model
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
 
-def test_update_user_success(db_session):
+async def test_update_user_success(db_session):
     """Test successful user update by the owner."""
     # Create a test user
     test_user = user_model.User(
@@ -15,8 +15,8 @@ def test_update_user_success(db_session):
         password="hashed_password"
     )
     db_session.add(test_user)
-    db_session.commit()
-    db_session.refresh(test_user)
+    await db_session.commit()
+    await db_session.refresh(test_user)
 
     # Mock current user
     current_user = MagicMock()
@@ -29,7 +29,7 @@ def test_update_user_success(db_session):
     )
 
     # Call the update function
-    result = update_user(
+    result = await update_user(
         user_id=test_user.id,
         user_data=update_data,
         db=db_session,
@@ -41,11 +41,11 @@ def test_update_user_success(db_session):
     assert result.email == "updated@example.com"
     
     # Verify in database
-    updated_user = db_session.query(user_model.User).filter(user_model.User.id == test_user.id).first()
+    updated_user = await db_session.scalar(select(user_model.User).filter(user_model.User.id == test_user.id))
     assert updated_user.name == "Updated Name"
     assert updated_user.email == "updated@example.com"
 
-def test_update_user_unauthorized(db_session):
+async def test_update_user_unauthorized(db_session):
     """Test update fails when non-owner tries to update."""
     # Create a test user
     test_user = user_model.User(
@@ -54,7 +54,7 @@ def test_update_user_unauthorized(db_session):
         password="hashed_password"
     )
     db_session.add(test_user)
-    db_session.commit()
+    await db_session.commit()
 
     # Mock current user (different ID)
     current_user = MagicMock()
@@ -66,7 +66,7 @@ def test_update_user_unauthorized(db_session):
     )
 
     with pytest.raises(HTTPException) as exc_info:
-        update_user(
+        await update_user(
             user_id=test_user.id,
             user_data=update_data,
             db=db_session,
@@ -76,7 +76,7 @@ def test_update_user_unauthorized(db_session):
     assert exc_info.value.status_code == 403
     assert "No autorizado" in str(exc_info.value.detail)
 
-def test_update_user_not_found(db_session):
+async def test_update_user_not_found(db_session):
     """Test update fails when user doesn't exist."""
     current_user = MagicMock()
     current_user.id = 1  # Current user is the one trying to update
@@ -87,7 +87,7 @@ def test_update_user_not_found(db_session):
     )
 
     with pytest.raises(HTTPException) as exc_info:
-        update_user(
+        await update_user(
             user_id=999,  # Non-existent user ID
             user_data=update_data,
             db=db_session,
@@ -98,7 +98,7 @@ def test_update_user_not_found(db_session):
     assert exc_info.value.status_code == 403
     assert "No autorizado" in str(exc_info.value.detail)
 
-def test_update_user_email_already_exists(db_session):
+async def test_update_user_email_already_exists(db_session):
     """Test update fails when trying to use an existing email."""
     # Create two test users
     user1 = user_model.User(
@@ -112,9 +112,9 @@ def test_update_user_email_already_exists(db_session):
         password="hashed2"
     )
     db_session.add_all([user1, user2])
-    db_session.commit()
-    db_session.refresh(user1)
-    db_session.refresh(user2)
+    await db_session.commit()
+    await db_session.refresh(user1)
+    await db_session.refresh(user2)
 
     current_user = MagicMock()
     current_user.id = user1.id
@@ -125,19 +125,18 @@ def test_update_user_email_already_exists(db_session):
         email="user2@example.com"  # Already exists
     )
 
-    # Update the test to expect an IntegrityError
-    with pytest.raises(IntegrityError):
-        update_user(
+    # The duplicate is caught before it reaches the unique index
+    with pytest.raises(HTTPException) as exc_info:
+        await update_user(
             user_id=user1.id,
             user_data=update_data,
             db=db_session,
             current_user=current_user
         )
-    
-    # Rollback the session to clean up the failed transaction
-    db_session.rollback()
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Email already registered"
 
-def test_update_user_partial_update(db_session):
+async def test_update_user_partial_update(db_session):
     """Test that only provided fields are updated."""
     # Create a test user
     test_user = user_model.User(
@@ -146,8 +145,8 @@ def test_update_user_partial_update(db_session):
         password="hashed_password"
     )
     db_session.add(test_user)
-    db_session.commit()
-    db_session.refresh(test_user)
+    await db_session.commit()
+    await db_session.refresh(test_user)
 
     current_user = MagicMock()
     current_user.id = test_user.id
@@ -158,7 +157,7 @@ def test_update_user_partial_update(db_session):
         # email not provided
     )
 
-    result = update_user(
+    result = await update_user(
         user_id=test_user.id,
         user_data=update_data,
         db=db_session,
@@ -167,4 +166,31 @@ def test_update_user_partial_update(db_session):
 
     # Verify only name was updated
     assert result.name == "New Name"
-    assert result.email == "original@example.com"  # Should remain unchanged
\ No newline at end of file
+    assert result.email == "original@example.com"  # Should remain unchanged
+
+
+async def test_update_user_normalizes_email(db_session):
+    """The new email is stored trimmed and lowercased, like on signup."""
+    test_user = user_model.User(name="Mixed Case", email="mixed@example.com", password="hashed")
+    other = user_model.User(name="Other", email="other@example.com", password="hashed")
+    db_session.add_all([test_user, other])
+    await db_session.commit()
+
+    current_user = MagicMock()
+    current_user.id = test_user.id
+
+    result = await update_user(user_id=test_user.id, user_data=UserUpdate(email="  New.Mail@Example.COM "),
+                               db=db_session, current_user=current_user)
+    assert result.email == "new.mail@example.com"
+
+    # Re-sending your own email in another case is fine
+    result = await update_user(user_id=test_user.id, user_data=UserUpdate(email="New.Mail@example.com"),
+                               db=db_session, current_user=current_user)
+    assert result.email == "new.mail@example.com"
+
+    # A case-only variant of someone else's email is rejected like on signup
+    with pytest.raises(HTTPException) as exc_info:
+        await update_user(user_id=test_user.id, user_data=UserUpdate(email="Other@Example.com"),
+                          db=db_session, current_user=current_user)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Email already registered"